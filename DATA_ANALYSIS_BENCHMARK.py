@@ -0,0 +1,313 @@
+"""Benchmarks for SIMPLE_DATA_ANALYSIS_APP.py that run without a browser.
+
+``parse`` compares single-process ``pd.read_csv`` with the app's parallel
+parser on synthetic CSV files (quoted text with embedded commas and newlines,
+integers, floats with missing values and a low-cardinality category):
+
+    python DATA_ANALYSIS_BENCHMARK.py parse --sizes 100MB 1GB 5GB --workers 32
+
+``pipeline`` runs the app's stages (ingest, dtypes, the opt-in memory
+optimization, describe, sort, rename, sample, missing-data handling) on
+synthetic datasets with a chosen null ratio and cardinality, and writes one
+JSON line per dataset and stage with the throughput, latency percentiles and
+peak memory:
+
+    python DATA_ANALYSIS_BENCHMARK.py pipeline --rows 10k 1M 50M --null-ratio 0.1 \\
+        --cardinality 1000 --repeat 5 --output baseline.jsonl
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from SIMPLE_DATA_ANALYSIS_APP import (
+    PARALLEL_MIN_BYTES, TransformPipeline, _available_cpus, _peak_rss_bytes, approximate_describe,
+    optimize_memory, parallel_read_csv,
+)
+
+# Rows generated per batch when writing synthetic files
+GENERATE_BATCH_ROWS = 200_000
+
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+COUNT_UNITS = {"K": 1_000, "M": 1_000_000}
+
+# Latency percentiles reported for every stage
+PERCENTILES = [50, 90, 95, 99]
+# Rows drawn by the sample stage, the app's default
+SAMPLE_ROWS = 5
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def parse_count(text: str) -> int:
+    text = text.strip().upper()
+    for unit, factor in COUNT_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def synthetic_batch(rng: np.random.Generator, rows: int, start: int) -> pd.DataFrame:
+    notes = np.array(["plain note", "note, with a comma", 'a "quoted" word', "spans\ntwo lines"])
+    values = rng.normal(size=rows)
+    values[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(start, start + rows),
+        "value": values,
+        "count": rng.integers(0, 1_000, rows),
+        "category": rng.choice(["alpha", "beta", "gamma", "delta"], rows),
+        "note": rng.choice(notes, rows),
+    })
+
+
+def write_synthetic_csv(path: str, size: int, seed: int = 0):
+    """Write batches of synthetic rows until the file reaches ``size`` bytes."""
+    rng = np.random.default_rng(seed)
+    written = rows = 0
+    with open(path, "w", newline="") as file:
+        while written < size:
+            batch = synthetic_batch(rng, GENERATE_BATCH_ROWS, rows)
+            text = batch.to_csv(index=False, header=(rows == 0))
+            file.write(text)
+            written += len(text.encode())
+            rows += len(batch)
+
+
+def benchmark_parse(sizes, workers: int, directory: str, keep: bool, verify: bool):
+    # More processes than usable cores only measures contention, as the app would never run them
+    available = _available_cpus()
+    if workers > available:
+        print(f"{workers} workers requested but {available} cores available; using {available}")
+        workers = available
+    print(f"{'size':>8} {'single (s)':>11} {'MB/s':>8} {'parallel (s)':>13} {'MB/s':>8} {'speedup':>8}")
+    for size in sizes:
+        path = os.path.join(directory, f"synthetic_{size}.csv")
+        if not os.path.exists(path):
+            write_synthetic_csv(path, size)
+        megabytes = os.path.getsize(path) / 1024 ** 2
+
+        start = time.perf_counter()
+        single = pd.read_csv(path)
+        single_seconds = time.perf_counter() - start
+        if not verify:
+            del single
+
+        start = time.perf_counter()
+        with open(path, "rb") as file:
+            parallel = parallel_read_csv(file.read(), workers=workers)
+        parallel_seconds = time.perf_counter() - start
+        if verify:
+            pd.testing.assert_frame_equal(single, parallel)
+            del single
+        del parallel
+
+        print(f"{megabytes:>6.0f}MB {single_seconds:>11.2f} {megabytes / single_seconds:>8.1f} "
+              f"{parallel_seconds:>13.2f} {megabytes / parallel_seconds:>8.1f} "
+              f"{single_seconds / parallel_seconds:>7.2f}x")
+        if not keep:
+            os.remove(path)
+
+
+def pipeline_batch(rng: np.random.Generator, rows: int, start: int, numeric_columns: int,
+                   text_columns: int, null_ratio: float, cardinality: int) -> pd.DataFrame:
+    """Rows with a unique id, normal floats, integers and text drawn from ``cardinality`` values.
+
+    Every column except the id has ``null_ratio`` of its values missing.
+    """
+    columns = {"id": np.arange(start, start + rows)}
+    for number in range(numeric_columns):
+        if number % 2:
+            values = rng.integers(0, cardinality, rows).astype(np.float64)
+        else:
+            values = rng.normal(size=rows)
+        values[rng.random(rows) < null_ratio] = np.nan
+        columns[f"number_{number}"] = values
+    vocabulary = np.array([f"value_{code}" for code in range(cardinality)], dtype=object)
+    for number in range(text_columns):
+        values = vocabulary[rng.integers(0, cardinality, rows)]
+        values[rng.random(rows) < null_ratio] = None
+        columns[f"text_{number}"] = values
+    return pd.DataFrame(columns)
+
+
+def write_pipeline_csv(path: str, rows: int, seed: int = 0, **shape):
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as file:
+        for start in range(0, rows, GENERATE_BATCH_ROWS):
+            batch = pipeline_batch(rng, min(GENERATE_BATCH_ROWS, rows - start), start, **shape)
+            file.write(batch.to_csv(index=False, header=(start == 0)))
+
+
+def _ingest(path: str, parallel: bool) -> pd.DataFrame:
+    if parallel and os.path.getsize(path) >= PARALLEL_MIN_BYTES:
+        with open(path, "rb") as file:
+            return parallel_read_csv(file.read())
+    return pd.read_csv(path)
+
+
+def pipeline_stages(path: str, parallel: bool):
+    """(name, run) pairs in app order; ``run(frame, key)`` returns the next stage's input.
+
+    Only ingest and rename change the frame the later stages see. ``key`` is
+    unique per run, so pipeline memos and cached column statistics never
+    carry over from an earlier repetition.
+    """
+    def pipeline(frame, key):
+        return TransformPipeline(key, frame, {})
+
+    def reading(measure):
+        # Stages that only look at the frame pass it on unchanged
+        def run(frame, key):
+            measure(frame, key)
+            return frame
+        return run
+
+    stages = [
+        ("ingest", lambda frame, key: _ingest(path, parallel)),
+        # The column types read_csv inferred, as the app's Data Types section shows them
+        ("dtypes", reading(lambda frame, key: frame.dtypes.astype(str))),
+        # Only run by the app when "Optimize memory usage" is ticked
+        ("optimize memory", reading(lambda frame, key: optimize_memory(frame))),
+        ("describe (exact)", reading(lambda frame, key: frame.describe())),
+        ("describe (approximate)", reading(lambda frame, key: approximate_describe(frame))),
+        ("sort preview", reading(lambda frame, key: pipeline(frame, key).sort_by("number_0").head())),
+        ("sort", reading(lambda frame, key: pipeline(frame, key).sort_by("number_0").ordered())),
+        ("rename", lambda frame, key: pipeline(frame, key).add("rename", old="number_0", new="renamed").frame()),
+        ("sample", reading(lambda frame, key: frame.sample(SAMPLE_ROWS))),
+        ("dropna", reading(lambda frame, key: pipeline(frame, key).add("dropna").frame())),
+        ("fillna (value)", reading(lambda frame, key: pipeline(frame, key).add("fillna", value=0.0).frame())),
+    ]
+    for strategy in ("Mean", "Median", "Mode"):
+        stages.append((f"fillna ({strategy.lower()})", reading(
+            lambda frame, key, strategy=strategy: pipeline(frame, key).add("fill_strategy", strategy=strategy).frame())))
+    return stages
+
+
+def _latency_summary(seconds: list) -> dict:
+    summary = {f"p{percentile}": round(float(np.percentile(seconds, percentile)), 6)
+               for percentile in PERCENTILES}
+    summary.update(min=round(min(seconds), 6), max=round(max(seconds), 6),
+                   mean=round(float(np.mean(seconds)), 6))
+    return summary
+
+
+def benchmark_pipeline(rows_list, repeat: int, directory: str, keep: bool, parallel: bool,
+                       output, seed: int, **shape):
+    """Time every stage ``repeat`` times, then once more under tracemalloc for its peak memory.
+
+    Timed runs are not traced, so the tracing overhead never shows in the latencies.
+    """
+    environment = {"python": platform.python_version(), "pandas": pd.__version__,
+                   "numpy": np.__version__, "machine": platform.machine(), "cpus": os.cpu_count()}
+    for rows in rows_list:
+        name = "_".join(f"{key}{value}" for key, value in sorted(shape.items()))
+        path = os.path.join(directory, f"pipeline_{rows}_{name}_seed{seed}.csv")
+        if not os.path.exists(path):
+            write_pipeline_csv(path, rows, seed, **shape)
+        file_bytes = os.path.getsize(path)
+
+        frame = None
+        for stage, run in pipeline_stages(path, parallel):
+            wall, cpu = [], []
+            for repetition in range(repeat):
+                key = f"benchmark-{rows}-{stage}-{repetition}"
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                result = run(frame, key)
+                wall.append(time.perf_counter() - wall_start)
+                cpu.append(time.process_time() - cpu_start)
+
+            tracemalloc.start()
+            run(frame, f"benchmark-{rows}-{stage}-traced")
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            frame = result
+            median = float(np.median(wall))
+            record = {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "benchmark": "pipeline",
+                "stage": stage,
+                "rows": rows,
+                "columns": int(frame.shape[1]),
+                "file_bytes": file_bytes,
+                "seed": seed,
+                "parallel": parallel,
+                "repeat": repeat,
+                "throughput_rows_s": round(rows / median, 1) if median else None,
+                "throughput_mb_s": round(file_bytes / 1024 ** 2 / median, 3)
+                if median and stage == "ingest" else None,
+                "latency_s": _latency_summary(wall),
+                "cpu_s_p50": round(float(np.median(cpu)), 6),
+                "peak_traced_bytes": traced_peak,
+                "peak_rss_bytes": _peak_rss_bytes(),
+                **shape,
+                **environment,
+            }
+            output.write(json.dumps(record, sort_keys=True) + "\n")
+            output.flush()
+        del frame, result
+        if not keep:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parse = commands.add_parser("parse", help="single-process vs parallel CSV parsing")
+    parse.add_argument("--sizes", nargs="+", default=["100MB", "1GB", "5GB"],
+                       help="synthetic file sizes, e.g. 100MB 1GB 5GB")
+    parse.add_argument("--workers", type=int, default=_available_cpus(),
+                       help="parser processes, at most the usable cores")
+    parse.add_argument("--dir", default=tempfile.gettempdir(), help="where synthetic files are written")
+    parse.add_argument("--keep", action="store_true", help="keep the synthetic files for later runs")
+    parse.add_argument("--verify", action="store_true", help="check both parsers return equal frames")
+
+    pipeline = commands.add_parser("pipeline", help="the app's pipeline stages, as JSON lines")
+    pipeline.add_argument("--rows", nargs="+", default=["10k", "100k", "1M"],
+                          help="synthetic dataset sizes in rows, e.g. 10k 1M 50M")
+    pipeline.add_argument("--numeric-columns", type=int, default=4, help="float and integer columns")
+    pipeline.add_argument("--text-columns", type=int, default=2, help="text columns")
+    pipeline.add_argument("--null-ratio", type=float, default=0.05, help="share of missing values per column")
+    pipeline.add_argument("--cardinality", type=int, default=100,
+                          help="distinct values of the integer and text columns")
+    pipeline.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    pipeline.add_argument("--seed", type=int, default=0, help="random seed of the synthetic data")
+    pipeline.add_argument("--no-parallel", dest="parallel", action="store_false",
+                          help="always parse with a single process")
+    pipeline.add_argument("--output", help="JSON lines file to append to (default: standard output)")
+    pipeline.add_argument("--dir", default=tempfile.gettempdir(), help="where synthetic files are written")
+    pipeline.add_argument("--keep", action="store_true", help="keep the synthetic files for later runs")
+
+    args = parser.parse_args()
+    if args.command == "parse":
+        benchmark_parse([parse_size(size) for size in args.sizes], args.workers, args.dir,
+                        args.keep, args.verify)
+    elif args.command == "pipeline":
+        output = open(args.output, "a") if args.output else sys.stdout
+        try:
+            benchmark_pipeline([parse_count(rows) for rows in args.rows], args.repeat, args.dir, args.keep,
+                               args.parallel, output, args.seed, numeric_columns=args.numeric_columns,
+                               text_columns=args.text_columns, null_ratio=args.null_ratio,
+                               cardinality=args.cardinality)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+
+if __name__ == "__main__":
+    main()
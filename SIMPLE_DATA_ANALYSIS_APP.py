@@ -1,300 +1,1621 @@
+import gzip
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Set a custom theme for the app
-st.set_page_config(
-    page_title="SIMPLE DATA EXPLORATION TOOL",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded",
-)
-
-# Custom CSS for dark theme and improved design
-st.markdown("""
-    <style>
-        body {
-            background-color: #121212;
-            color: #E1E1E1;
-        }
-        .sidebar .sidebar-content {
-            background: #333333;
-        }
-        .css-18e3th9 {
-            background-color: #333333;
-        }
-        .css-1d391kg p {
-            color: #E1E1E1;
-        }
-        .stButton button {
-            background-color: #4CAF50;
-            color: white;
-            border: none;
-            padding: 10px 24px;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 16px;
-        }
-        .stSlider .st-bg {
-            background-color: #4CAF50;
-        }
-        .stSelectbox, .stTextInput {
-            color: #E1E1E1;
-        }
-        .stDataFrame {
-            border: 1px solid #4CAF50;
-        }
-        .stColorPicker input {
-            background-color: #333333;
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-# Title of the app
-st.title("📊 Professional Data Analysis and Visualization Tool")
-
-# File uploader to accept CSV files
-uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
-if uploaded_file is not None:
+# Rows parsed per chunk in streaming mode; bounds the memory used while reading
+STREAM_CHUNK_ROWS = 100_000
+# Chunk dtypes that concatenate to what a full read infers (integers widened to float)
+STREAM_WIDENING_DTYPES = {np.dtype("int64"), np.dtype("float64")}
+# Default relative error of the approximate (sketch-based) statistics
+APPROX_ERROR = 0.01
+
+# Limits of the in-memory cache of parsed datasets (least recently used goes first)
+CACHE_MAX_ENTRIES = 8
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+# On-disk Parquet copies of parsed datasets, reused by restarted workers
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "simple_data_analysis_cache")
+CACHE_MAX_DISK_BYTES = 10 * 1024 ** 3
+
+# Uploads at least this large are parsed by a pool of processes
+PARALLEL_MIN_BYTES = 64 * 1024 ** 2
+# Size of the byte ranges handed to each parser process
+PARALLEL_RANGE_BYTES = 16 * 1024 ** 2
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+try:
+    import pyarrow  # noqa: F401  (optional, enables the on-disk Parquet cache)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import resource  # Unix only; peak RSS is reported as unavailable elsewhere
+except ImportError:
+    resource = None
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max of a column, merged chunk by chunk."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        chunk = RunningMoments()
+        chunk.count = values.size
+        chunk.mean = values.mean()
+        chunk.m2 = ((values - chunk.mean) ** 2).sum()
+        chunk.min = values.min()
+        chunk.max = values.max()
+        self.merge(chunk)
+
+    def merge(self, other: "RunningMoments"):
+        if other.count == 0:
+            return
+        # Chan et al. parallel update of the mean and sum of squared deviations
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+        self.count = total
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch.
+
+    Values are kept in levels of sorted compactors; a full level keeps every
+    other value (random offset) at twice the weight one level up. With
+    ``error`` = e the rank of a returned quantile is off by roughly e * n.
+    """
+
+    def __init__(self, error: float = APPROX_ERROR, seed: int = 0):
+        self.capacity = max(8, int(np.ceil(2.0 / error)))
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0)]
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def merge(self, other: "QuantileSketch"):
+        for height, items in enumerate(other.levels):
+            if height == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[height] = np.concatenate([self.levels[height], items])
+        self._compact()
+
+    def _compact(self):
+        height = 0
+        while height < len(self.levels):
+            items = self.levels[height]
+            if items.size >= self.capacity:
+                items = np.sort(items)
+                # An odd item out stays behind so the total weight is preserved
+                keep, items = items[items.size - items.size % 2:], items[:items.size - items.size % 2]
+                promoted = items[self.rng.integers(2)::2]
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], promoted])
+                self.levels[height] = keep
+            height += 1
+
+    def quantile(self, q: float) -> float:
+        items = np.concatenate(self.levels)
+        if items.size == 0:
+            return np.nan
+        weights = np.concatenate([np.full(level.size, 2.0 ** height)
+                                  for height, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[order][min(position, items.size - 1)])
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with a standard error of about ``error``."""
+
+    def __init__(self, error: float = APPROX_ERROR):
+        self.precision = int(min(16, max(4, np.ceil(np.log2((1.04 / error) ** 2)))))
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    def update(self, series: pd.Series):
+        hashes = pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy()
+        if hashes.size == 0:
+            return
+        p = np.uint64(self.precision)
+        buckets = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # Leading zeros of the remaining bits, read from their top 53 bits (exact in float64)
+        top = ((hashes << p) >> np.uint64(11)).astype(np.float64)
+        bit_length = np.frexp(top)[1]
+        rank = np.where(top > 0, 54 - bit_length, 54).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * np.log(m / zeros)
+        return float(round(estimate))
+
+
+class ColumnSketch:
+    """Approximate describe() statistics of one column, built chunk by chunk."""
+
+    def __init__(self, error: float = APPROX_ERROR):
+        self.count = 0
+        self.moments = RunningMoments()
+        self.quantiles = QuantileSketch(error)
+        self.distinct = HyperLogLog(error)
+
+    def update(self, series: pd.Series):
+        self.count += int(series.count())
+        self.distinct.update(series)
+        if _is_describable(series.dtype):
+            values = series.to_numpy(dtype="float64", na_value=np.nan)
+            self.moments.update(values)
+            self.quantiles.update(values)
+
+    def merge(self, other: "ColumnSketch"):
+        self.count += other.count
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.distinct.merge(other.distinct)
+
+
+def _is_describable(dtype) -> bool:
+    # describe() covers numeric columns only; booleans are left out as in pandas
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def sketch_description(schema: pd.DataFrame, sketches: dict) -> pd.DataFrame:
+    """describe()-style table from column sketches, plus approximate distinct counts."""
+    numeric = [column for column in schema.columns
+               if _is_describable(schema[column].dtype) and column in sketches]
+    if not numeric:
+        return pd.DataFrame({column: [sketches[column].count, sketches[column].distinct.estimate()]
+                             for column in schema.columns if column in sketches},
+                            index=["count", "distinct"])
+    return pd.DataFrame({
+        column: [sketch.moments.count, sketch.moments.mean, sketch.moments.std, sketch.moments.min,
+                 sketch.quantiles.quantile(0.25), sketch.quantiles.quantile(0.5),
+                 sketch.quantiles.quantile(0.75), sketch.moments.max, sketch.distinct.estimate()]
+        for column, sketch in ((column, sketches[column]) for column in numeric)
+    }, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max", "distinct"])
+
+
+def approximate_describe(frame: pd.DataFrame, error: float = APPROX_ERROR,
+                         chunk_rows: int = STREAM_CHUNK_ROWS) -> pd.DataFrame:
+    """Sketch-based describe() of an in-memory frame, processed in row slices."""
+    sketches = {column: ColumnSketch(error) for column in frame.columns}
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        for column in frame.columns:
+            sketches[column].update(chunk[column])
+    return sketch_description(frame.iloc[:0], sketches)
+
+
+class StreamedDataset:
+    """Shape, dtypes, preview and describe() statistics built from CSV chunks."""
+
+    def __init__(self, shape, dtypes, preview, description):
+        self.shape = shape
+        self.dtypes = dtypes
+        self.preview = preview
+        self.description = description
+
+
+def _mixed_columns(chunk_dtypes: dict) -> list:
+    """Columns whose per-chunk dtypes do not concatenate to a full read's dtype."""
+    return [column for column, dtypes in chunk_dtypes.items()
+            if len(dtypes) > 1 and not dtypes <= STREAM_WIDENING_DTYPES]
+
+
+def stream_csv(file, chunk_rows: int = STREAM_CHUNK_ROWS, error: float = APPROX_ERROR) -> StreamedDataset:
+    """Read a CSV in bounded chunks, keeping only mergeable sketches in memory."""
+    file.seek(0)
+    rows = 0
+    schema = None
+    preview = None
+    sketches = {}
+    chunk_dtypes = {}
+    for chunk in pd.read_csv(file, chunksize=chunk_rows):
+        if preview is None:
+            preview = chunk.head()
+        rows += len(chunk)
+        schema = chunk.iloc[:0] if schema is None else pd.concat([schema, chunk.iloc[:0]])
+        for column in chunk.columns:
+            chunk_dtypes.setdefault(column, set()).add(chunk[column].dtype)
+            sketches.setdefault(column, ColumnSketch(error)).update(chunk[column])
+    file.seek(0)
+
+    if schema is None:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    # Concatenated chunk dtypes only match a full read when integers widen to float;
+    # other mixes (bool and int, int and text, int64 and uint64) differ, so those
+    # columns alone are read again in full and their sketches rebuilt
+    mixed = _mixed_columns(chunk_dtypes)
+    if mixed:
+        columns = pd.read_csv(file, usecols=mixed)
+        file.seek(0)
+        schema = schema.astype({column: columns[column].dtype for column in mixed})
+        preview = preview.copy()
+        for column in mixed:
+            preview[column] = columns[column].iloc[:len(preview)]
+            sketches[column] = ColumnSketch(error)
+            for start in range(0, len(columns), chunk_rows):
+                sketches[column].update(columns[column].iloc[start:start + chunk_rows])
+    return StreamedDataset((rows, len(schema.columns)), schema.dtypes, preview,
+                           sketch_description(schema, sketches))
+
+
+def content_key(file) -> str:
+    """Hash of the uploaded bytes, so identical files share one cache entry."""
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    for block in iter(lambda: file.read(1 << 20), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _size_of(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class DatasetCache:
+    """LRU cache of parsed datasets capped by entry count and memory, with an
+    optional Parquet copy of each DataFrame on disk.
+
+    Cached frames are shared between reruns and must not be modified in place.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 disk_dir: str = None, max_disk_bytes: int = CACHE_MAX_DISK_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir if HAS_PYARROW else None
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.parquet")
+
+    def get(self, key: str):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                value = pd.read_parquet(self._disk_path(key))
+            except Exception:
+                return None
+            self.put(key, value, persist=False)
+            return value
+        return None
+
+    def put(self, key: str, value, persist: bool = True):
+        size = _size_of(value)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            self._evict()
+        if persist and self.disk_dir and isinstance(value, pd.DataFrame):
+            self._write_to_disk(key, value)
+
+    def resize(self, key: str):
+        """Re-measure an entry that grew after it was stored, e.g. lazily built indexes."""
+        with self.lock:
+            if key not in self.entries:
+                return
+            value, size = self.entries.pop(key)
+            new_size = _size_of(value)
+            self.entries[key] = (value, new_size)
+            self.total_bytes += new_size - size
+            self._evict()
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the byte cap
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries
+                                         or self.total_bytes > self.max_bytes):
+            self.total_bytes -= self.entries.popitem(last=False)[1][1]
+
+    def get_or_load(self, key: str, loader, persist: bool = True):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value, persist=persist)
+        return value
+
+    def _write_to_disk(self, key: str, frame: pd.DataFrame):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        # Write under a temporary name so a crash never leaves a partial file
+        partial = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            frame.to_parquet(partial)
+            os.replace(partial, path)
+        except Exception:
+            # Frames Arrow cannot represent (e.g. mixed-type columns) stay memory-only
+            if os.path.exists(partial):
+                os.remove(partial)
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir)
+                 if name.endswith(".parquet")]
+        files.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in files)
+        while files and total > self.max_disk_bytes:
+            oldest = files.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
+
+
+@st.cache_resource
+def get_dataset_cache() -> DatasetCache:
+    # One cache per server process, shared by every session and rerun
+    return DatasetCache(disk_dir=CACHE_DIR)
+
+
+def dataset_key(uploaded_file) -> str:
+    """Content hash of an upload, computed once per upload and session."""
+    file_id = getattr(uploaded_file, "file_id", None)
+    known = st.session_state.setdefault("dataset_keys", {})
+    if file_id is None:
+        return content_key(uploaded_file)
+    if file_id not in known:
+        known[file_id] = content_key(uploaded_file)
+    return known[file_id]
+
+
+def _record_ends(data: bytes, targets) -> list:
+    """Offset just past the first record-ending newline at or after each target.
+
+    A newline ends a record only outside quotes, i.e. when the number of
+    quote characters before it is even (RFC 4180 escapes quotes by doubling
+    them, which keeps the parity).
+    """
+    ends = []
+    position = quotes = 0
+    for target in targets:
+        if ends and target < position:
+            # Still inside the record found for the previous target
+            ends.append(position)
+            continue
+        if target > position:
+            quotes += data.count(b'"', position, target)
+            position = target
+        while True:
+            newline = data.find(b"\n", position)
+            if newline < 0:
+                position = len(data)
+                break
+            quotes += data.count(b'"', position, newline)
+            position = newline + 1
+            if quotes % 2 == 0:
+                break
+        ends.append(position)
+    return ends
+
+
+def _is_text(series: pd.Series) -> bool:
+    # Object columns count as text only if their values are strings (not e.g. bools)
+    if pd.api.types.is_object_dtype(series.dtype):
+        return pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+    return pd.api.types.is_string_dtype(series.dtype)
+
+
+def _available_cpus() -> int:
+    # Cores this process may run on, which containers and affinity masks can limit
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _worker_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def parallel_read_csv(data: bytes, workers: int = None,
+                      range_bytes: int = PARALLEL_RANGE_BYTES) -> pd.DataFrame:
+    """Parse CSV bytes on several cores, matching a single ``pd.read_csv``.
+
+    The body is split into byte ranges on record boundaries, each range is
+    parsed with the header in a process pool, and columns whose inferred
+    dtypes disagree between ranges are reconciled the way a full read would.
+    With fewer than two cores available it is a single ``pd.read_csv``.
+    """
+    workers = workers or _available_cpus()
+    if workers < 2:
+        return pd.read_csv(io.BytesIO(data))
+    header_end = _record_ends(data, [0])[0]
+    header = data[:header_end]
+    bounds = sorted(set([header_end, len(data)]
+                        + _record_ends(data, range(header_end + range_bytes, len(data), range_bytes))))
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    if len(ranges) <= 1:
+        return pd.read_csv(io.BytesIO(data))
+
+    # pd.read_csv itself is the task, so nothing from this script has to be importable by workers.
+    # Forking a server with live threads can deadlock the children, so workers start fresh
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_worker_context()) as pool:
+        chunks = list(pool.map(pd.read_csv, (io.BytesIO(header + data[start:end]) for start, end in ranges)))
+
+        # A column holding numbers in one range and text in another would have
+        # been read as text in full, so re-read the non-text ranges as text
+        as_text = {}
+        for column in chunks[0].columns:
+            filled = [_is_text(chunk[column]) for chunk in chunks if chunk[column].notna().any()]
+            if any(filled) and not all(filled):
+                for i, chunk in enumerate(chunks):
+                    if not _is_text(chunk[column]):
+                        as_text.setdefault(i, {})[column] = str
+        reparsed = {i: pool.submit(pd.read_csv, io.BytesIO(header + data[ranges[i][0]:ranges[i][1]]),
+                                   dtype=columns) for i, columns in as_text.items()}
+        for i, future in reparsed.items():
+            chunks[i] = future.result()
+
+    # Ranges where a text column is entirely empty were read as float NaN
+    for column in chunks[0].columns:
+        text = [chunk[column].dtype for chunk in chunks if _is_text(chunk[column])]
+        if text:
+            for chunk in chunks:
+                if not _is_text(chunk[column]):
+                    chunk[column] = chunk[column].astype(text[0])
+    # Ranges mixing e.g. int64 and uint64 would concatenate large ids to float64,
+    # so such columns are taken from a full read of just those columns
+    mixed = _mixed_columns({column: {chunk[column].dtype for chunk in chunks} for column in chunks[0].columns})
+    frame = pd.concat(chunks, ignore_index=True)
+    if mixed:
+        frame[mixed] = pd.read_csv(io.BytesIO(data), usecols=mixed)[mixed]
+    return frame
+
+
+def load_dataset(uploaded_file, key: str, parallel: bool = True) -> pd.DataFrame:
+    def parse():
+        if parallel and uploaded_file.size >= PARALLEL_MIN_BYTES:
+            return parallel_read_csv(uploaded_file.getvalue())
+        uploaded_file.seek(0)
+        return pd.read_csv(uploaded_file)
+    return get_dataset_cache().get_or_load(key, parse)
+
+
+def _downcast(series: pd.Series) -> pd.Series:
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        signed = series.empty or series.min() < 0
+        return pd.to_numeric(series, downcast="integer" if signed else "unsigned")
+    if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+        # float32 is only used when every value survives the round trip unchanged
+        narrowed = series.astype(np.float32)
+        if np.array_equal(narrowed.to_numpy(dtype=np.float64), series.to_numpy(dtype=np.float64),
+                          equal_nan=True):
+            return narrowed
+        return series
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        if len(series) and series.nunique(dropna=False) <= CATEGORY_MAX_RATIO * len(series):
+            return series.astype("category")
+    return series
+
+
+def optimize_memory(frame: pd.DataFrame):
+    """Downcast numeric columns and compact repetitive text columns.
+
+    Returns the optimized frame and a per-column before/after memory report.
+    """
+    optimized = pd.DataFrame({column: _downcast(frame[column]) for column in frame.columns},
+                             index=frame.index)
+    before = frame.memory_usage(deep=True, index=False)
+    after = optimized.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "Original dtype": frame.dtypes.astype(str),
+        "Optimized dtype": optimized.dtypes.astype(str),
+        "Original memory (KB)": (before / 1024).round(1),
+        "Optimized memory (KB)": (after / 1024).round(1),
+        "Saved (%)": (100 * (1 - after / before.where(before > 0))).round(1),
+    })
+    return optimized, report
+
+
+def load_optimized_dataset(uploaded_file, key: str, parallel: bool = True):
+    cache = get_dataset_cache()
+    report = cache.get(f"{key}-memory-report")
+    optimized = cache.get(f"{key}-optimized")
+    if optimized is None or report is None:
+        optimized, report = optimize_memory(load_dataset(uploaded_file, key, parallel))
+        cache.put(f"{key}-optimized", optimized)
+        cache.put(f"{key}-memory-report", report, persist=False)
+    return optimized, report
+
+
+def top_k(frame: pd.DataFrame, column: str, ascending: bool, k: int) -> pd.DataFrame:
+    """First ``k`` rows of a stable sort by ``column``, found by partial selection.
+
+    Matches ``frame.sort_values(column, ascending=..., kind="stable").head(k)``
+    (nulls last, ties in row order) in O(n) instead of O(n log n).
+    """
+    series = frame[column]
+    dtype = series.dtype
+    if len(frame) <= k:
+        return frame.sort_values(by=column, ascending=ascending, kind="stable")
+    exact_float = pd.api.types.is_float_dtype(dtype) or pd.api.types.is_bool_dtype(dtype) or (
+        pd.api.types.is_integer_dtype(dtype) and series.abs().max() < 2 ** 53)
+    if exact_float:
+        keys = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    else:
+        # Other types are ranked through their sorted distinct values
+        codes, _ = pd.factorize(series, sort=True)
+        keys = np.where(codes < 0, np.nan, codes.astype(np.float64))
+    if not ascending:
+        keys = -keys
+    nulls = np.isnan(keys)
+    valid = np.flatnonzero(~nulls)
+    if len(valid) > k:
+        valid_keys = keys[valid]
+        kth = np.partition(valid_keys, k - 1)[k - 1]
+        below = valid[valid_keys < kth]
+        chosen = np.concatenate([below, valid[valid_keys == kth][:k - len(below)]])
+    else:
+        chosen = valid
+    chosen = chosen[np.lexsort((chosen, keys[chosen]))]
+    chosen = np.concatenate([chosen, np.flatnonzero(nulls)[:k - len(chosen)]])
+    return frame.iloc[chosen]
+
+
+def _rename_column(frame: pd.DataFrame, old: str, new: str) -> pd.DataFrame:
+    # A shallow copy with new labels shares the column data instead of copying it
+    renamed = frame.copy(deep=False)
+    renamed.columns = [new if column == old else column for column in frame.columns]
+    return renamed
+
+
+def _fill_value(frame: pd.DataFrame, value) -> pd.DataFrame:
+    # Categorical columns only accept known categories, so register the fill value first
+    missing_category = [column for column in frame.columns
+                        if isinstance(frame[column].dtype, pd.CategoricalDtype)
+                        and value not in frame[column].cat.categories and frame[column].hasnans]
+    if missing_category:
+        frame = frame.copy(deep=False)
+        for column in missing_category:
+            frame[column] = frame[column].cat.add_categories([value])
+    return frame.fillna(value)
+
+
+class ColumnStatistics:
+    """Counts, sums, medians and modes of every column.
+
+    Built in one pass per dataset version and shared by the mean, median and
+    mode fill strategies. Means and medians cover numeric columns; the mode
+    (the smallest of the most frequent values, as ``df.mode().iloc[0]``)
+    covers every column.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.counts, self.sums, self.medians, self.modes = {}, {}, {}, {}
+        for column in frame.columns:
+            series = frame[column]
+            self.counts[column] = int(series.count())
+            if _is_describable(series.dtype):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                values = values[~np.isnan(values)]
+                self.sums[column] = float(values.sum())
+                # np.median selects with a partition, so no column is fully sorted
+                self.medians[column] = float(np.median(values)) if values.size else np.nan
+            # Hash-based counting; the counts are never sorted
+            frequencies = series.value_counts(sort=False)
+            if len(frequencies):
+                most_frequent = frequencies.index[frequencies.to_numpy() == frequencies.max()]
+                try:
+                    self.modes[column] = most_frequent.min()
+                except TypeError:
+                    self.modes[column] = most_frequent[0]
+
+    @property
+    def nbytes(self) -> int:
+        return (sum(sys.getsizeof(table) for table in (self.counts, self.sums, self.medians, self.modes))
+                + sum(sys.getsizeof(mode) for mode in self.modes.values()))
+
+    @property
+    def means(self) -> dict:
+        return {column: total / self.counts[column] if self.counts[column] else np.nan
+                for column, total in self.sums.items()}
+
+
+def _fill_with_strategy(frame: pd.DataFrame, strategy: str, statistics: ColumnStatistics) -> pd.DataFrame:
+    if strategy == "Mean":
+        return frame.fillna(statistics.means)
+    if strategy == "Median":
+        return frame.fillna(statistics.medians)
+    return frame.fillna(statistics.modes)
+
+
+# Transformations a pipeline step can name, applied as op(frame, **params)
+TRANSFORMS = {
+    "rename": _rename_column,
+    "dropna": lambda frame: frame.dropna(),
+    "fillna": lambda frame, value: _fill_value(frame, value),
+    "fill_strategy": _fill_with_strategy,
+}
+
+
+class TransformPipeline:
+    """Ordered log of transformations over a cached dataset, evaluated lazily.
+
+    The result of every prefix of the log is memoized in ``memo`` (kept in the
+    session state), so a rerun that changes only the last step starts from the
+    cached result of the step before it.
+
+    Sorting commutes with the row-wise steps, so it is recorded separately and
+    only applied by ``ordered()`` when the full ordering is needed; previews
+    use ``head()``, which selects the top rows without sorting.
+    """
+
+    def __init__(self, base_key: str, base: pd.DataFrame, memo: dict):
+        self.base_key = base_key
+        self.base = base
+        self.memo = memo
+        self.steps = []
+        self.order = None
+
+    def add(self, op: str, **params) -> "TransformPipeline":
+        self.steps.append((op, tuple(sorted(params.items()))))
+        return self
+
+    def apply(self, op: str, **params) -> pd.DataFrame:
+        """Add a step and return the full result; a step that raises is not kept."""
+        self.add(op, **params)
+        try:
+            return self.frame()
+        except Exception:
+            self.steps.pop()
+            raise
+
+    def sort_by(self, column: str, ascending: bool = True) -> "TransformPipeline":
+        self.order = (column, ascending)
+        return self
+
+    def _prefix(self, length: int) -> tuple:
+        return (self.base_key,) + tuple(self.steps[:length])
+
+    def _order_key(self) -> tuple:
+        return self._prefix(len(self.steps)) + (("order",) + self.order,)
+
+    def _sort_column(self) -> str:
+        # The sort column was chosen before any rename, so follow it through them
+        column = self.order[0]
+        for op, params in self.steps:
+            params = dict(params)
+            if op == "rename" and params["old"] == column:
+                column = params["new"]
+        return column
+
+    def frame(self, upto: int = None) -> pd.DataFrame:
+        """Result of the first ``upto`` steps (all of them by default), unsorted."""
+        upto = len(self.steps) if upto is None else upto
+        start, result = 0, self.base
+        for length in range(upto, 0, -1):
+            if self._prefix(length) in self.memo:
+                start, result = length, self.memo[self._prefix(length)]
+                break
+        for length in range(start + 1, upto + 1):
+            op, params = self.steps[length - 1]
+            params = dict(params)
+            if op == "fill_strategy":
+                # Every strategy reads the same cached statistics of the step's input
+                params["statistics"] = self.statistics(length - 1, result)
+            result = TRANSFORMS[op](result, **params)
+            self.memo[self._prefix(length)] = result
+        return result
+
+    def statistics(self, upto: int, frame: pd.DataFrame) -> ColumnStatistics:
+        """Column statistics of ``frame``, the result of the first ``upto`` steps."""
+        return get_dataset_cache().get_or_load(f"{self._version(upto)}-column-stats",
+                                               lambda: ColumnStatistics(frame), persist=False)
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """First ``n`` rows of the sorted result, without sorting everything."""
+        if self.order is None:
+            return self.frame().head(n)
+        return top_k(self.frame(), self._sort_column(), self.order[1], n)
+
+    def ordered(self, frame: pd.DataFrame = None) -> pd.DataFrame:
+        """``frame`` (the full result by default) in the recorded sort order."""
+        if self.order is None:
+            return self.frame() if frame is None else frame
+        if frame is not None:
+            return frame.sort_values(by=self._sort_column(), ascending=self.order[1], kind="stable")
+        if self._order_key() not in self.memo:
+            self.memo[self._order_key()] = self.ordered(self.frame())
+        return self.memo[self._order_key()]
+
+    def _version(self, length: int) -> str:
+        return hashlib.blake2b(repr(self._prefix(length)).encode(), digest_size=16).hexdigest()
+
+    @property
+    def version(self) -> str:
+        """Key identifying the (unsorted) dataset produced by the whole log."""
+        return self._version(len(self.steps))
+
+    def prune(self):
+        """Drop memoized results that are no longer part of the log."""
+        live = {self._prefix(length) for length in range(1, len(self.steps) + 1)}
+        if self.order is not None:
+            live.add(self._order_key())
+        for prefix in [prefix for prefix in self.memo if prefix not in live]:
+            del self.memo[prefix]
+
+
+# Comparison operators offered by the Advanced Filter section
+FILTER_OPERATORS = ["==", "!=", "<", "<=", ">", ">="]
+# Matching rows shown below the filter; the full result is kept for export
+FILTER_PREVIEW_ROWS = 1_000
+
+
+def _coerce_value(series: pd.Series, text: str):
+    """Convert filter input text to the type stored in ``series``."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    try:
+        if pd.api.types.is_bool_dtype(dtype):
+            if text.strip().lower() not in ("true", "false", "1", "0"):
+                raise ValueError
+            return text.strip().lower() in ("true", "1")
+        if pd.api.types.is_numeric_dtype(dtype):
+            return float(text)
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return pd.Timestamp(text)
+    except ValueError:
+        raise ValueError(f"Value '{text}' is not valid for column '{series.name}'.") from None
+    return text
+
+
+class ColumnIndex:
+    """Sorted row-position index of one column, built on first use.
+
+    The non-null positions are kept ordered by value, so equality and range
+    lookups are binary searches and only the matching positions are sorted
+    back into row order. Columns whose values cannot be ordered (e.g. numbers
+    and text in one object column) answer equality with a scan instead.
+    """
+
+    def __init__(self, series: pd.Series):
+        self.series = series
+        self._order = None
+        self._sorted_values = None
+        self._sortable = True
+        # Counted once when the index is built, not on every cache re-measure
+        self.nbytes = 0
+
+    def _build_sorted(self):
+        valid = np.flatnonzero(self.series.notna().to_numpy())
+        values = self.series.to_numpy()[valid]
+        try:
+            order = np.argsort(values, kind="stable")
+        except TypeError:
+            self._sortable = False
+            return
+        self._order = valid[order]
+        self._sorted_values = values[order]
+        self.nbytes = self._order.nbytes + self._sorted_values.nbytes
+
+    def lookup(self, operator: str, value) -> np.ndarray:
+        """Ascending positions of the rows where ``column <operator> value``."""
+        if self._order is None and self._sortable:
+            self._build_sorted()
+        if operator in ("==", "!="):
+            if self._sortable:
+                start = np.searchsorted(self._sorted_values, value, side="left")
+                end = np.searchsorted(self._sorted_values, value, side="right")
+                matches = np.sort(self._order[start:end])
+            else:
+                matches = np.flatnonzero((self.series == value).to_numpy(dtype=bool, na_value=False))
+            if operator == "==":
+                return matches
+            # Complement of the equality match; like pandas, nulls count as unequal
+            mask = np.ones(len(self.series), dtype=bool)
+            mask[matches] = False
+            return np.flatnonzero(mask)
+        if not self._sortable:
+            raise ValueError(f"Values of column '{self.series.name}' cannot be ordered.")
+        if operator in ("<", "<="):
+            end = np.searchsorted(self._sorted_values, value, side="left" if operator == "<" else "right")
+            return np.sort(self._order[:end])
+        start = np.searchsorted(self._sorted_values, value, side="right" if operator == ">" else "left")
+        return np.sort(self._order[start:])
+
+
+class DatasetIndexes:
+    """Per-column indexes of one dataset version, built lazily and cached."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.columns = {}
+        self._frame_bytes = None
+
+    def column(self, name: str) -> ColumnIndex:
+        if name not in self.columns:
+            self.columns[name] = ColumnIndex(self.frame[name])
+        return self.columns[name]
+
+    def filter(self, conditions: list, combine: str = "AND") -> np.ndarray:
+        """Row positions matching (column, operator, text) conditions joined by AND/OR."""
+        result = None
+        for column, operator, text in conditions:
+            index = self.column(column)
+            value = _coerce_value(index.series, text)
+            rows = index.lookup(operator, value)
+            if operator == "==" and not len(rows):
+                raise ValueError(f"Value '{text}' not found in column '{column}'.")
+            if result is None:
+                result = rows
+            elif combine == "AND":
+                result = np.intersect1d(result, rows, assume_unique=True)
+            else:
+                result = np.union1d(result, rows)
+        return result if result is not None else np.arange(len(self.frame))
+
+    @property
+    def nbytes(self) -> int:
+        # The frame is counted too: the indexes keep it alive after the pipeline drops it
+        if self._frame_bytes is None:
+            self._frame_bytes = _size_of(self.frame)
+        return self._frame_bytes + sum(index.nbytes for index in self.columns.values())
+
+
+# Rows encoded at a time when exporting, so the output is never built in one piece
+EXPORT_CHUNK_ROWS = 100_000
+# Export formats: file extension and MIME type of the download
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "simple_data_analysis_exports")
+# Export files older than this are removed, in case a session ended before its file was
+EXPORT_MAX_AGE_S = 60 * 60
+
+
+def write_export(frame: pd.DataFrame, export_format: str, file, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Encode ``frame`` into the binary ``file`` chunk by chunk."""
+    if export_format == "Parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # One schema for the whole frame, so every row group matches the first
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        with pq.ParquetWriter(file, schema) as writer:
+            for start in range(0, max(len(frame), 1), chunk_rows):
+                writer.write_table(pa.Table.from_pandas(frame.iloc[start:start + chunk_rows], schema=schema,
+                                                        preserve_index=False))
+        return
+    sink = gzip.GzipFile(fileobj=file, mode="wb") if export_format == "CSV (gzip)" else file
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        sink.write(chunk.to_csv(index=False, header=(start == 0)).encode("utf-8"))
+    if sink is not file:
+        sink.close()
+
+
+def _remove_stale_exports(max_age: float = EXPORT_MAX_AGE_S):
+    cutoff = time.time() - max_age
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def prepare_export(frame: pd.DataFrame, export_format: str) -> str:
+    """Path of a temporary file holding the encoded export; the caller removes it."""
+    extension = EXPORT_FORMATS[export_format][0]
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _remove_stale_exports()
+    handle, path = tempfile.mkstemp(prefix="export_", suffix=f".{extension}", dir=EXPORT_DIR)
     try:
-        df = pd.read_csv(uploaded_file)
-        st.success("File uploaded successfully!")
-        
-        # Display the shape of the dataset
-        st.subheader("Dataset Shape")
-        st.write(f"The dataset has {df.shape[0]} rows and {df.shape[1]} columns.")
-        
-        # Display the data types of the columns
-        st.subheader("Data Types")
-        st.write(df.dtypes)
-        
-    except Exception as e:
-        st.error(f"Error loading file: {e}")
-        df = None  # Ensure df is None if the file loading fails
-    if df is not None:
-        # Add Reset Button
-        if st.button("Reset Dataset"):
-            df = pd.read_csv(uploaded_file)
-            st.info("Dataset has been reset.")
-
-        st.subheader("Data Preview")
-        st.write(df.head())
-
-        st.subheader("Data Description")
-        st.write(df.describe())
-        
-        st.subheader("Select Columns to Display")
-        columns_to_display = st.multiselect("Choose columns", df.columns.tolist(), default=df.columns.tolist())
-        st.write(df[columns_to_display].head())
-
-        st.subheader("Sort Data")
-        sort_column = st.selectbox("Select column to sort by", df.columns.tolist())
-        sort_order = st.radio("Sort order", ["Ascending", "Descending"])
-        df = df.sort_values(by=sort_column, ascending=(sort_order == "Ascending"))
-        st.write(df.head())
-
-        st.subheader("Rename Columns")
-        column_to_rename = st.selectbox("Select column to rename", df.columns.tolist())
-        new_column_name = st.text_input("Enter new column name")
-        if st.button("Rename Column"):
-            df.rename(columns={column_to_rename: new_column_name}, inplace=True)
-            st.success(f"Column '{column_to_rename}' renamed to '{new_column_name}'.")
+        with os.fdopen(handle, "wb") as file:
+            write_export(frame, export_format, file)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+# Columns converted and multiplied together per block when computing correlations
+CORRELATION_BLOCK_COLUMNS = 128
+# Heatmaps with more columns than this are drawn without numbers in the cells
+HEATMAP_ANNOTATE_MAX = 20
+
+
+def _blocks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class CorrelationEngine:
+    """Pairwise-complete Pearson correlations of the numeric columns.
+
+    The matrix is assembled from per-pair sufficient statistics (pair count,
+    sums, sums of squares and cross products), computed as matrix products
+    over blocks of columns. Columns are identified by a hash of their values,
+    so when a new version of the dataset arrives only the pairs involving new
+    or changed columns are recomputed.
+    """
+
+    def __init__(self, block_columns: int = CORRELATION_BLOCK_COLUMNS):
+        self.block_columns = block_columns
+        self.fingerprints = []
+        # n, sum x, sum y, sum x^2, sum y^2, sum xy for every (x, y) column pair
+        self.stats = np.zeros((6, 0, 0))
+
+    @staticmethod
+    def _fingerprint(series: pd.Series) -> str:
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _centered(frame: pd.DataFrame, columns: list):
+        values = frame[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        # Centering on the column mean keeps the sums small and the result stable
+        counts = present.sum(axis=0)
+        means = np.divide(np.where(present, values, 0.0).sum(axis=0), counts,
+                          out=np.zeros(len(columns)), where=counts > 0)
+        return np.where(present, values - means, 0.0), present.astype(np.float64)
+
+    @staticmethod
+    def _pair_stats(left, right) -> np.ndarray:
+        (x, x_present), (y, y_present) = left, right
+        return np.stack([x_present.T @ y_present, x.T @ y_present, x_present.T @ y,
+                         (x * x).T @ y_present, x_present.T @ (y * y), x.T @ y])
+
+    def correlation(self, frame: pd.DataFrame) -> pd.DataFrame:
+        columns = [column for column in frame.columns if pd.api.types.is_numeric_dtype(frame[column].dtype)]
+        fingerprints = [self._fingerprint(frame[column]) for column in columns]
+        known = {fingerprint: i for i, fingerprint in enumerate(self.fingerprints)}
+
+        stats = np.empty((6, len(columns), len(columns)))
+        reused = [i for i, fingerprint in enumerate(fingerprints) if fingerprint in known]
+        previous = [known[fingerprints[i]] for i in reused]
+        stats[np.ix_(range(6), reused, reused)] = self.stats[np.ix_(range(6), previous, previous)]
+
+        changed = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in known]
+        everything = list(range(len(columns)))
+        for left_block in _blocks(changed, self.block_columns):
+            left = self._centered(frame, [columns[i] for i in left_block])
+            for right_block in _blocks(everything, self.block_columns):
+                right = self._centered(frame, [columns[i] for i in right_block])
+                block = self._pair_stats(left, right)
+                stats[np.ix_(range(6), left_block, right_block)] = block
+                # The mirrored pairs swap the roles of x and y
+                stats[np.ix_(range(6), right_block, left_block)] = block[[0, 2, 1, 4, 3, 5]].transpose(0, 2, 1)
+        self.fingerprints, self.stats = fingerprints, stats
+
+        n, sum_x, sum_y, sum_xx, sum_yy, sum_xy = stats
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = (n * sum_xy - sum_x * sum_y) / np.sqrt((n * sum_xx - sum_x ** 2)
+                                                                 * (n * sum_yy - sum_y ** 2))
+        return pd.DataFrame(np.clip(correlation, -1.0, 1.0), index=columns, columns=columns)
+
+
+# Default number of points handed to matplotlib/seaborn per plot
+PLOT_POINT_BUDGET = 5_000
+# Plot types and the downsampling applied to them before rendering
+PLOT_DOWNSAMPLING = {
+    "Line Plot": "lttb",
+    "Area Plot": "lttb",
+    "Scatter Plot": "bins",
+    "KDE Plot": "bins",
+    "Bar Plot": "groups",
+    "Box Plot": "sample",
+    "Violin Plot": "sample",
+    "Pair Plot": "sample",
+}
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions of the points kept by largest-triangle-three-buckets.
+
+    ``x`` must be sorted. The first and last points are always kept; from each
+    bucket in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket is selected.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket == threshold - 3:
+            next_x, next_y = x[n - 1], y[n - 1]
+        else:
+            next_x = x[end:edges[bucket + 2]].mean()
+            next_y = y[end:edges[bucket + 2]].mean()
+        areas = np.abs((x[anchor] - next_x) * (y[start:end] - y[anchor])
+                       - (x[anchor] - x[start:end]) * (next_y - y[anchor]))
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def _plot_axis(series: pd.Series) -> np.ndarray:
+    # Numeric position of each x value; text columns fall back to row order
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.arange(len(series), dtype=np.float64)
+
+
+def _has_value_axis(series: pd.Series) -> bool:
+    # Axes whose _plot_axis positions are the values themselves, not row order
+    dtype = series.dtype
+    return pd.api.types.is_datetime64_any_dtype(dtype) or (
+        pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype))
+
+
+def _from_plot_axis(positions: np.ndarray, series: pd.Series):
+    # Inverse of _plot_axis for value axes: datetimes come back from nanoseconds
+    dtype = series.dtype
+    if not pd.api.types.is_datetime64_any_dtype(dtype):
+        return positions
+    values = pd.to_datetime(positions.astype(np.int64))
+    tz = getattr(dtype, "tz", None)
+    return values.tz_localize("UTC").tz_convert(tz) if tz is not None else values
+
+
+def downsample(frame: pd.DataFrame, x_column: str, y_column: str, method: str,
+               budget: int = PLOT_POINT_BUDGET) -> pd.DataFrame:
+    """At most ``budget`` points (or bins/groups) that summarize two columns.
+
+    ``lttb`` keeps the visual shape of a line; ``bins`` aggregates into a 2D
+    grid whose ``_points`` column counts the rows per bin; ``groups`` averages
+    y per x value; ``sample`` draws random rows. Only numeric and datetime
+    axes are binned; other axes get a sample with ``_points`` set to 1.
+    """
+    data = frame[[x_column, y_column]] if x_column != y_column else frame[[x_column]]
+    data = data.dropna()
+    if method == "lttb":
+        x = _plot_axis(data[x_column])
+        if not np.all(x[1:] >= x[:-1]):
+            order = np.argsort(x, kind="stable")
+            data, x = data.iloc[order], x[order]
+        return data.iloc[lttb(x, _plot_axis(data[y_column]), budget)]
+    if method == "bins":
+        if not (_has_value_axis(data[x_column]) and _has_value_axis(data[y_column])):
+            # Row positions are no values to bin; a sample of real rows keeps the axis meaningful
+            sampled = data if len(data) <= budget else data.sample(budget, random_state=0)
+            return sampled.assign(_points=1)
+        if len(data) <= budget:
+            return data.assign(_points=1)
+        side = max(2, int(np.sqrt(budget)))
+        counts, x_edges, y_edges = np.histogram2d(_plot_axis(data[x_column]), _plot_axis(data[y_column]),
+                                                  bins=side)
+        x_index, y_index = np.nonzero(counts)
+        return pd.DataFrame({
+            x_column: _from_plot_axis((x_edges[x_index] + x_edges[x_index + 1]) / 2, data[x_column]),
+            y_column: _from_plot_axis((y_edges[y_index] + y_edges[y_index + 1]) / 2, data[y_column]),
+            "_points": counts[x_index, y_index],
+        })
+    if method == "groups":
+        if x_column == y_column:
+            # The mean of x within each x is x itself
+            return data.drop_duplicates().sort_values(x_column).head(budget)
+        means = data.groupby(x_column, observed=True)[y_column].mean()
+        return means.head(budget).reset_index()
+    if len(data) <= budget:
+        return data
+    return data.sample(budget, random_state=0)
+
+
+def draw_plot(ax, frame: pd.DataFrame, plot_type: str, x_column: str, y_column: str,
+              color: str, line_style: str):
+    """Render one of the single-axes plot types onto ``ax``."""
+    if plot_type == "Line Plot":
+        ax.plot(frame[x_column], frame[y_column], marker='o', markersize=3, linestyle=line_style,
+                color=color, label=y_column)
+        ax.set_title(f'{y_column} vs {x_column} (Line Plot)')
+    elif plot_type == "Bar Plot":
+        ax.bar(frame[x_column].astype(str), frame[y_column], color=color, label=y_column)
+        ax.set_title(f'{y_column} vs {x_column} (Bar Plot)')
+    elif plot_type == "Scatter Plot":
+        sizes = 10 + 90 * frame["_points"] / frame["_points"].max()
+        ax.scatter(frame[x_column], frame[y_column], s=sizes, color=color, alpha=0.6, label=y_column)
+        ax.set_title(f'{y_column} vs {x_column} (Scatter Plot)')
+    elif plot_type == "Histogram":
+        ax.hist(frame[x_column].dropna(), bins=20, color=color)
+        ax.set_title(f'{x_column} Distribution (Histogram)')
+        ax.set_xlabel(x_column)
+        ax.set_ylabel("Frequency")
+    elif plot_type == "Box Plot":
+        sns.boxplot(x=frame[x_column], y=frame[y_column], ax=ax, color=color)
+        ax.set_title(f'{y_column} Distribution by {x_column} (Box Plot)')
+    elif plot_type == "Pie Chart":
+        pie_data = frame[y_column].value_counts()
+        ax.pie(pie_data, labels=pie_data.index, colors=sns.color_palette("pastel"), autopct='%1.1f%%')
+        ax.set_title(f'{y_column} Distribution (Pie Chart)')
+    elif plot_type == "Heatmap":
+        # ``frame`` is the correlation matrix here
+        sns.heatmap(frame, annot=len(frame) <= HEATMAP_ANNOTATE_MAX, cmap="coolwarm", ax=ax)
+        ax.set_title('Correlation Heatmap')
+    elif plot_type == "Area Plot":
+        ax.fill_between(frame[x_column], frame[y_column], color=color, alpha=0.4, label=y_column)
+        ax.set_title(f'{y_column} vs {x_column} (Area Plot)')
+    elif plot_type == "Violin Plot":
+        sns.violinplot(x=frame[x_column], y=frame[y_column], ax=ax, color=color)
+        ax.set_title(f'{y_column} Distribution by {x_column} (Violin Plot)')
+    elif plot_type == "Hexbin Plot":
+        # hexbin aggregates into a fixed grid itself, so it gets every point
+        ax.hexbin(_plot_axis(frame[x_column]), _plot_axis(frame[y_column]), gridsize=50, cmap="viridis")
+        ax.set_title(f'{y_column} vs {x_column} (Hexbin Plot)')
+    elif plot_type == "KDE Plot":
+        sns.kdeplot(x=frame[x_column], y=frame[y_column], weights=frame["_points"], ax=ax, fill=True,
+                    color=color)
+        ax.set_title(f'{y_column} vs {x_column} (KDE Plot)')
+
+
+# Stage measurements kept per session for the profiling panel
+PROFILE_MAX_RECORDS = 500
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ProfiledStage:
+    """Measurements of one stage; set ``frame`` to record the frame it produced."""
+
+    def __init__(self, name: str, frame: pd.DataFrame = None):
+        self.name = name
+        self.frame = frame
+
+
+class StageProfiler:
+    """Records wall time, CPU time, peak RSS growth and frame size per stage.
+
+    CPU time is process-wide and the RSS delta only shows growth of the
+    process's peak, so a stage that stays below an earlier peak reports 0.
+    """
+
+    def __init__(self, records: deque, dataset: str = None):
+        self.records = records
+        self.dataset = dataset
+
+    @contextmanager
+    def stage(self, name: str, frame: pd.DataFrame = None):
+        stage = ProfiledStage(name, frame)
+        peak_before = _peak_rss_bytes()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield stage
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            peak_after = _peak_rss_bytes()
+            frame = stage.frame
+            self.records.append({
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "dataset": self.dataset,
+                "stage": name,
+                "wall_s": round(wall, 6),
+                "cpu_s": round(cpu, 6),
+                "peak_rss_delta_bytes": None if peak_before is None else peak_after - peak_before,
+                "rows": None if frame is None else int(frame.shape[0]),
+                "columns": None if frame is None else int(frame.shape[1]),
+                "frame_bytes": None if frame is None else int(frame.memory_usage(deep=False).sum()),
+            })
+
+
+def render_profiling_panel(records: deque):
+    with st.sidebar.expander("Profiling", expanded=False):
+        if not records:
+            st.write("No stages recorded yet.")
+            return
+        st.dataframe(pd.DataFrame(list(records)).iloc[::-1], hide_index=True)
+        payload = "".join(json.dumps(record) + "\n" for record in records)
+        st.download_button("Export as JSON lines", payload, file_name="profile.jsonl",
+                           mime="application/jsonl")
+        if st.button("Clear measurements"):
+            records.clear()
+
+
+def main():
+    # Set a custom theme for the app
+    st.set_page_config(
+        page_title="SIMPLE DATA EXPLORATION TOOL",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="expanded",
+    )
+
+    # Custom CSS for dark theme and improved design
+    st.markdown("""
+        <style>
+            body {
+                background-color: #121212;
+                color: #E1E1E1;
+            }
+            .sidebar .sidebar-content {
+                background: #333333;
+            }
+            .css-18e3th9 {
+                background-color: #333333;
+            }
+            .css-1d391kg p {
+                color: #E1E1E1;
+            }
+            .stButton button {
+                background-color: #4CAF50;
+                color: white;
+                border: none;
+                padding: 10px 24px;
+                text-align: center;
+                text-decoration: none;
+                display: inline-block;
+                font-size: 16px;
+            }
+            .stSlider .st-bg {
+                background-color: #4CAF50;
+            }
+            .stSelectbox, .stTextInput {
+                color: #E1E1E1;
+            }
+            .stDataFrame {
+                border: 1px solid #4CAF50;
+            }
+            .stColorPicker input {
+                background-color: #333333;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Title of the app
+    st.title("📊 Professional Data Analysis and Visualization Tool")
+
+    # File uploader to accept CSV files
+    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+    streaming_mode = st.sidebar.checkbox(
+        "Streaming mode (large files)", value=False,
+        help=f"Read the file in chunks of {STREAM_CHUNK_ROWS:,} rows so memory stays flat.")
+    parallel_mode = st.sidebar.checkbox(
+        "Parallel parsing", value=True,
+        help=f"Parse uploads over {PARALLEL_MIN_BYTES // 1024 ** 2} MB on all CPU cores.")
+    optimize_mode = st.sidebar.checkbox(
+        "Optimize memory usage", value=False,
+        help="Downcast numeric columns and store repetitive text columns as categories.")
+    approx_error = st.sidebar.select_slider(
+        "Approximate statistics error", options=[0.001, 0.005, 0.01, 0.02, 0.05], value=APPROX_ERROR,
+        help="Relative error bound of the sketch-based percentiles and distinct counts.")
+    profile_records = st.session_state.setdefault("profile_records", deque(maxlen=PROFILE_MAX_RECORDS))
+    profiler = StageProfiler(profile_records)
+    if uploaded_file is not None and streaming_mode:
+        try:
+            key = dataset_key(uploaded_file)
+            profiler.dataset = key
+            with profiler.stage("stream parse"):
+                summary = get_dataset_cache().get_or_load(
+                    f"{key}-stream-{approx_error}", lambda: stream_csv(uploaded_file, error=approx_error),
+                    persist=False)
+            st.success("File streamed successfully!")
+
+            st.subheader("Dataset Shape")
+            st.write(f"The dataset has {summary.shape[0]} rows and {summary.shape[1]} columns.")
+
+            st.subheader("Data Types")
+            st.write(summary.dtypes)
+
+            st.subheader("Data Preview")
+            st.write(summary.preview)
+
+            st.subheader("Data Description")
+            st.write(summary.description)
+            st.caption(f"Percentiles and distinct counts are approximate (error about {approx_error:.1%}).")
+
+            st.info("Column selection, sorting, renaming, sampling and missing-data handling need the "
+                    "full dataset in memory. Turn off streaming mode to use them.")
+        except Exception as e:
+            st.error(f"Error loading file: {e}")
+    elif uploaded_file is not None:
+        try:
+            key = dataset_key(uploaded_file)
+            profiler.dataset = key
+            with profiler.stage("parse") as stage:
+                if optimize_mode:
+                    df, memory_report = load_optimized_dataset(uploaded_file, key, parallel_mode)
+                else:
+                    df = load_dataset(uploaded_file, key, parallel_mode)
+                stage.frame = df
+            st.success("File uploaded successfully!")
+
+            # Display the shape of the dataset
+            st.subheader("Dataset Shape")
+            st.write(f"The dataset has {df.shape[0]} rows and {df.shape[1]} columns.")
+
+            # Display the data types of the columns
+            st.subheader("Data Types")
+            st.write(df.dtypes)
+
+            if optimize_mode:
+                st.subheader("Memory Optimization")
+                st.write(memory_report)
+                before_total = memory_report["Original memory (KB)"].sum()
+                after_total = memory_report["Optimized memory (KB)"].sum()
+                st.write(f"Memory usage reduced from {before_total:,.1f} KB to {after_total:,.1f} KB.")
+
+        except Exception as e:
+            st.error(f"Error loading file: {e}")
+            df = None  # Ensure df is None if the file loading fails
+        if df is not None:
+            # Transformations are recorded per dataset and replayed lazily on each rerun
+            renames = st.session_state.setdefault("renames", {}).setdefault(key, [])
+            pipeline = TransformPipeline(f"{key}-optimized" if optimize_mode else key, df, st.session_state.setdefault("pipeline_memo", {}))
+
+            # Add Reset Button
+            if st.button("Reset Dataset"):
+                # The cached frame is never modified, so resetting needs no re-parse
+                renames.clear()
+                st.info("Dataset has been reset.")
+
+            st.subheader("Data Preview")
             st.write(df.head())
 
-        st.subheader("Sample Data")
-        sample_size = st.slider("Select number of rows to sample", min_value=1, max_value=len(df), value=5)
-        st.write(df.sample(sample_size))
-
-        st.subheader("Handle Missing Data")
-        missing_option = st.selectbox("Select how to handle missing data", 
-                                     ["None", "Drop missing values", 
-                                      "Fill missing values with specific value", 
-                                      "Fill missing values with mean/median/mode"])
-        
-        if missing_option == "Drop missing values":
-            df = df.dropna()
-            st.success("Missing values dropped.")
-        elif missing_option == "Fill missing values with specific value":
-            fill_value = st.text_input("Enter value to fill missing data")
-            try:
-                df = df.fillna(float(fill_value))
-                st.success(f"Missing values filled with '{fill_value}'.")
-            except ValueError:
-                st.error("Please enter a valid numeric value.")
-        elif missing_option == "Fill missing values with mean/median/mode":
-            fill_strategy = st.selectbox("Choose strategy", ["Mean", "Median", "Mode"])
+            st.subheader("Data Description")
+            statistics_mode = st.radio("Statistics mode", ["Exact", "Approximate"], horizontal=True)
+            with profiler.stage(f"describe ({statistics_mode.lower()})", df):
+                if statistics_mode == "Exact":
+                    description = df.describe()
+                else:
+                    description = get_dataset_cache().get_or_load(
+                        f"{pipeline.base_key}-describe-{approx_error}",
+                        lambda: approximate_describe(df, approx_error), persist=False)
+            st.write(description)
+            if statistics_mode == "Approximate":
+                st.caption(f"Percentiles and distinct counts are approximate (error about {approx_error:.1%}).")
+
+            st.subheader("Select Columns to Display")
+            columns_to_display = st.multiselect("Choose columns", df.columns.tolist(), default=df.columns.tolist())
+            st.write(df[columns_to_display].head())
+
+            st.subheader("Sort Data")
+            sort_column = st.selectbox("Select column to sort by", df.columns.tolist())
+            sort_order = st.radio("Sort order", ["Ascending", "Descending"])
+            pipeline.sort_by(sort_column, ascending=(sort_order == "Ascending"))
+            with profiler.stage("sort preview", df):
+                sorted_preview = pipeline.head()
+            st.write(sorted_preview)
+
+            st.subheader("Rename Columns")
+            for old_name, new_name in renames:
+                pipeline.add("rename", old=old_name, new=new_name)
+            with profiler.stage("rename") as stage:
+                stage.frame = pipeline.frame()
+            column_to_rename = st.selectbox("Select column to rename", stage.frame.columns.tolist())
+            new_column_name = st.text_input("Enter new column name")
+            if st.button("Rename Column"):
+                if new_column_name:
+                    renames.append((column_to_rename, new_column_name))
+                    pipeline.add("rename", old=column_to_rename, new=new_column_name)
+                    st.success(f"Column '{column_to_rename}' renamed to '{new_column_name}'.")
+                    st.write(pipeline.head())
+                else:
+                    st.error("Please enter a new column name.")
+
+            st.subheader("Sample Data")
+            df = pipeline.frame()
+            sample_size = st.slider("Select number of rows to sample", min_value=1, max_value=len(df), value=5)
+            with profiler.stage("sample", df):
+                sample = df.sample(sample_size)
+            st.write(sample)
+
+            st.subheader("Handle Missing Data")
+            missing_option = st.selectbox("Select how to handle missing data", 
+                                         ["None", "Drop missing values", 
+                                          "Fill missing values with specific value", 
+                                          "Fill missing values with mean/median/mode"])
+
+            if missing_option == "Drop missing values":
+                with profiler.stage("dropna") as stage:
+                    df = stage.frame = pipeline.apply("dropna")
+                st.success("Missing values dropped.")
+            elif missing_option == "Fill missing values with specific value":
+                fill_value = st.text_input("Enter value to fill missing data")
+                try:
+                    with profiler.stage("fillna (value)") as stage:
+                        df = stage.frame = pipeline.apply("fillna", value=float(fill_value))
+                    st.success(f"Missing values filled with '{fill_value}'.")
+                except ValueError:
+                    st.error("Please enter a valid numeric value.")
+            elif missing_option == "Fill missing values with mean/median/mode":
+                fill_strategy = st.selectbox("Choose strategy", ["Mean", "Median", "Mode"])
+                try:
+                    if df.select_dtypes(include='number').empty:
+                        st.error("Dataframe contains no numeric columns.")
+                    else:
+                        with profiler.stage(f"fillna ({fill_strategy.lower()})") as stage:
+                            df = stage.frame = pipeline.apply("fill_strategy", strategy=fill_strategy)
+                        st.success(f"Missing values filled with '{fill_strategy}' strategy.")
+                except Exception as e:
+                    st.error(f"Error filling missing values: {e}")
+            pipeline.prune()
+
+            st.subheader("Advanced Filter Data")
+            columns = df.columns.tolist()
+            combine = st.radio("Combine filters with", ["AND", "OR"], horizontal=True)
+            conditions = []
+            for number in (1, 2):
+                column_box, operator_box, value_box = st.columns(3)
+                selected_column = column_box.selectbox(f"Select column {number} to filter by", columns,
+                                                       key=f"filter_column_{number}")
+                selected_operator = operator_box.selectbox("Operator", FILTER_OPERATORS,
+                                                           key=f"filter_operator_{number}")
+                selected_value = value_box.text_input(f"Enter value for {selected_column}",
+                                                      key=f"filter_value_{number}")
+                if selected_value:
+                    conditions.append((selected_column, selected_operator, selected_value))
+
+            filtered_df = None
             try:
-                if df.select_dtypes(include='number').empty:
-                    st.error("Dataframe contains no numeric columns.")
+                if conditions:
+                    with profiler.stage("filter") as stage:
+                        # Indexes are built once per dataset version and reused across reruns
+                        indexes = get_dataset_cache().get_or_load(
+                            f"{pipeline.version}-indexes", lambda: DatasetIndexes(df), persist=False)
+                        # Only the matching rows are sorted, never the whole dataset
+                        filtered_df = stage.frame = pipeline.ordered(df.iloc[indexes.filter(conditions, combine)])
+                        # The filter may have built new indexes, so the cache re-measures the entry
+                        get_dataset_cache().resize(f"{pipeline.version}-indexes")
+                    st.write(f"{len(filtered_df)} matching rows.")
+                    st.write(filtered_df.head(FILTER_PREVIEW_ROWS))
                 else:
-                    if fill_strategy == "Mean":
-                        df = df.fillna(df.mean())
-                    elif fill_strategy == "Median":
-                        df = df.fillna(df.median())
-                    elif fill_strategy == "Mode":
-                        df = df.fillna(df.mode().iloc[0])
-                    st.success(f"Missing values filled with '{fill_strategy}' strategy.")
+                    st.info("Enter a value for at least one filter.")
+            except ValueError as ve:
+                st.error(ve)
+            except KeyError:
+                st.error("Selected column or value not found in the dataset.")
             except Exception as e:
-                st.error(f"Error filling missing values: {e}")
-else:
-    st.warning("Please upload a CSV file to proceed.")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-        # st.subheader("Advanced Filter Data")
-        # columns = df.columns.tolist()
-        # selected_column_1 = st.selectbox("Select first column to filter by", columns)
-        # selected_value_1 = st.text_input(f"Enter value for {selected_column_1}")
-        # selected_column_2 = st.selectbox("Select second column to filter by", columns)
-        # selected_value_2 = st.text_input(f"Enter value for {selected_column_2}")
-        
-        # try:
-        #     if selected_value_1 and selected_value_1 not in df[selected_column_1].unique():
-        #         raise ValueError(f"Value '{selected_value_1}' not found in column '{selected_column_1}'.")
-        #     if selected_value_2 and selected_value_2 not in df[selected_column_2].unique():
-        #         raise ValueError(f"Value '{selected_value_2}' not found in column '{selected_column_2}'.")
-
-        #     if selected_value_1 and selected_value_2:
-        #         filtered_df = df[(df[selected_column_1] == selected_value_1) & (df[selected_column_2] == selected_value_2)]
-        #         st.write(filtered_df)
-        #     else:
-        #         st.error("Please provide valid values for both filters.")
-        # except ValueError as ve:
-        #     st.error(ve)
-        # except KeyError:
-        #     st.error("Selected column or value not found in the dataset.")
-        # except Exception as e:
-        #     st.error(f"An unexpected error occurred: {e}")
-
-        # st.subheader("Export Filtered Data")
-        # if st.button("Download Filtered Data as CSV"):
-        #     try:
-        #         filtered_df.to_csv("filtered_data.csv", index=False)
-        #         st.success("Filtered data downloaded.")
-        #     except Exception as e:
-        #         st.error(f"Error exporting data: {e}")
-
-        # st.subheader("Plot Data")
-        # x_column = st.selectbox("Select x-axis column", columns)
-        # y_column = st.selectbox("Select y-axis column", columns)
-        
-        # plot_type = st.selectbox("Select Plot Type", 
-        #                          ["Line Plot", "Bar Plot", "Scatter Plot", 
-        #                           "Histogram", "Box Plot", "Pie Chart", 
-        #                           "Heatmap", "Area Plot", "Violin Plot", 
-        #                           "Pair Plot", "Hexbin Plot", "KDE Plot"])
-        
-        # color_option = st.color_picker("Pick a color for the plot", "#4CAF50")
-        # line_style = st.selectbox("Select line style (for line plot)", ["-", "--", "-.", ":"], index=0)
-        # grid_option = st.checkbox("Show grid lines", value=True)
-        # legend_option = st.checkbox("Show legend", value=True)
-
-        # if st.button("Generate plot"):
-        #     try:
-        #         fig, ax = plt.subplots(figsize=(10, 6))
-                
-        #         if plot_type == "Line Plot":
-        #             ax.plot(df[x_column], df[y_column], marker='o', linestyle=line_style, color=color_option)
-        #             ax.set_title(f'{y_column} vs {x_column} (Line Plot)')
-        #         elif plot_type == "Bar Plot":
-        #             ax.bar(df[x_column], df[y_column], color=color_option)
-        #             ax.set_title(f'{y_column} vs {x_column} (Bar Plot)')
-        #         elif plot_type == "Scatter Plot":
-        #             ax.scatter(df[x_column], df[y_column], color=color_option)
-        #             ax.set_title(f'{y_column} vs {x_column} (Scatter Plot)')
-        #         elif plot_type == "Histogram":
-        #             ax.hist(df[x_column], bins=20, color=color_option)
-        #             ax.set_title(f'{x_column} Distribution (Histogram)')
-        #             ax.set_xlabel(x_column)
-        #             ax.set_ylabel("Frequency")
-        #         elif plot_type == "Box Plot":
-        #             sns.boxplot(x=df[x_column], y=df[y_column], ax=ax, color=color_option)
-        #             ax.set_title(f'{y_column} Distribution by {x_column} (Box Plot)')
-        #         elif plot_type == "Pie Chart":
-        #             pie_data = df[y_column].value_counts()
-        #             ax.pie(pie_data, labels=pie_data.index, colors=sns.color_palette("pastel"), autopct='%1.1f%%')
-        #             ax.set_title(f'{y_column} Distribution (Pie Chart)')
-        #         elif plot_type == "Heatmap":
-        #             sns.heatmap(df.corr(), annot=True, cmap="coolwarm", ax=ax)
-        #             ax.set_title(f'{x_column} Correlation Heatmap')
-        #         elif plot_type == "Area Plot":
-        #             ax.fill_between(df[x_column], df[y_column], color=color_option, alpha=0)
-        #             st.pyplot()
-        #             st.success("Pair plot generated.")
-        #         else:
-        #             if grid_option:
-        #                 ax.grid(True)
-
-        #             if legend_option and plot_type != "Pair Plot":
-        #                 ax.legend()
-
-        #             st.pyplot(fig)
-        #             st.success("Plot generated successfully!")
-    
-                
-        #         if grid_option:
-        #             ax.grid(True)
-                
-        #         if legend_option and plot_type != "Pair Plot":
-        #             ax.legend()
-
-        #         st.pyplot(fig)
-        #         st.success("Plot generated successfully!")
-        #     except Exception as e:  
-        #         st.error(f"Error generating plot: {e}")
-# else:
-#     st.warning("Please upload a CSV file to proceed.")
+                st.error(f"An unexpected error occurred: {e}")
+
+            st.subheader("Export Filtered Data")
+            export_formats = [name for name in EXPORT_FORMATS if name != "Parquet" or HAS_PYARROW]
+            export_format = st.selectbox("Export format", export_formats)
+            if st.button("Prepare export"):
+                export_path = None
+                try:
+                    with profiler.stage(f"export ({export_format})") as stage:
+                        export_df = stage.frame = filtered_df if filtered_df is not None else pipeline.ordered()
+                        export_path = prepare_export(export_df, export_format)
+                    extension, mime = EXPORT_FORMATS[export_format]
+                    # Streamlit copies the file into its media store when the button is drawn, which
+                    # only happens on this run, so later reruns never read the export again
+                    with open(export_path, "rb") as export_file:
+                        st.download_button(f"Download {len(export_df)} rows as {export_format}", export_file,
+                                           file_name=f"filtered_data.{extension}", mime=mime)
+                    st.caption("The download is available until the next change on this page.")
+                except Exception as e:
+                    st.error(f"Error exporting data: {e}")
+                finally:
+                    if export_path is not None and os.path.exists(export_path):
+                        os.remove(export_path)
+
+            st.subheader("Plot Data")
+            x_column = st.selectbox("Select x-axis column", columns)
+            y_column = st.selectbox("Select y-axis column", columns)
+
+            plot_type = st.selectbox("Select Plot Type", 
+                                     ["Line Plot", "Bar Plot", "Scatter Plot", 
+                                      "Histogram", "Box Plot", "Pie Chart", 
+                                      "Heatmap", "Area Plot", "Violin Plot", 
+                                      "Pair Plot", "Hexbin Plot", "KDE Plot"])
+
+            color_option = st.color_picker("Pick a color for the plot", "#4CAF50")
+            line_style = st.selectbox("Select line style (for line plot)", ["-", "--", "-.", ":"], index=0)
+            grid_option = st.checkbox("Show grid lines", value=True)
+            legend_option = st.checkbox("Show legend", value=True)
+            point_budget = st.number_input("Maximum points to draw", min_value=100, max_value=1_000_000,
+                                           value=PLOT_POINT_BUDGET, step=1_000)
+
+            if st.button("Generate plot"):
+                try:
+                    with profiler.stage(f"plot ({plot_type.lower()})", df):
+                        method = PLOT_DOWNSAMPLING.get(plot_type)
+                        if plot_type == "Pair Plot":
+                            numeric_df = df.select_dtypes(include='number')
+                            plot_df = get_dataset_cache().get_or_load(
+                                f"{pipeline.version}-plot-sample-{point_budget}",
+                                lambda: numeric_df.sample(min(len(numeric_df), point_budget), random_state=0),
+                                persist=False)
+                            fig = sns.pairplot(plot_df).figure
+                        else:
+                            plot_df = df
+                            if plot_type == "Heatmap":
+                                engine = st.session_state.setdefault("correlation_engine", CorrelationEngine())
+                                plot_df = get_dataset_cache().get_or_load(
+                                    f"{pipeline.version}-correlation", lambda: engine.correlation(df), persist=False)
+                            elif method is not None:
+                                # Downsampled series are cached per dataset version, columns and budget
+                                plot_df = get_dataset_cache().get_or_load(
+                                    f"{pipeline.version}-plot-{method}-{x_column}-{y_column}-{point_budget}",
+                                    lambda: downsample(df, x_column, y_column, method, point_budget),
+                                    persist=False)
+                            fig, ax = plt.subplots(figsize=(10, 6))
+                            draw_plot(ax, plot_df, plot_type, x_column, y_column, color_option, line_style)
+                            if grid_option:
+                                ax.grid(True)
+                            if legend_option and ax.get_legend_handles_labels()[0]:
+                                ax.legend()
+
+                        st.pyplot(fig)
+                    if method is not None and len(plot_df) < len(df):
+                        st.caption(f"Drawn from {len(plot_df):,} points summarizing {len(df):,} rows.")
+                    st.success("Plot generated successfully!")
+                except Exception as e:  
+                    st.error(f"Error generating plot: {e}")
+    else:
+        st.warning("Please upload a CSV file to proceed.")
+
+    render_profiling_panel(profile_records)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,765 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
-from tkcalendar import DateEntry
+import argparse
+import bisect
+import collections
+import csv
 import datetime
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from operator import attrgetter
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Problems found away from the user's actions (journal writes, the tasks.txt import);
+# the window shows these warnings, and headless runs print them
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ['Low', 'Medium', 'High']
+# Sort rank of each priority, most urgent first
+PRIORITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+DATE_FORMAT = '%Y-%m-%d'
+TASKS_DB = 'tasks.db'
+# Plain-text task list of earlier versions, imported once into a new database next to it
+TASKS_TXT = 'tasks.txt'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    priority_rank INTEGER NOT NULL,
+    due_ordinal INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_due ON tasks (due_ordinal);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority_rank);
+CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+"""
+# PRAGMA user_version once tasks.txt has been imported
+SCHEMA_IMPORTED = 1
+
+# Due-date buckets a view can be filtered to, relative to today
+DUE_BUCKETS = ['Overdue', 'Today', 'This Week', 'Later']
+
+def due_bucket(due_ordinal, today_ordinal):
+    days = due_ordinal - today_ordinal
+    if days < 0:
+        return 'Overdue'
+    if days == 0:
+        return 'Today'
+    return 'This Week' if days < 7 else 'Later'
+
+# Sort keys of the view orders, read straight from the precomputed task fields
+SORT_KEYS = {
+    'added': attrgetter('id'),
+    'priority': attrgetter('rank', 'due_ordinal', 'id'),
+    'due': attrgetter('due_ordinal', 'rank', 'id'),
+}
+
+# A task record; the due date and priority are turned into sort keys once, when set
+class Task:
+    __slots__ = ('id', 'text', 'priority', 'rank', 'due', 'due_ordinal', 'completed')
+
+    def __init__(self, task_id, text, priority, due, completed=False):
+        self.id = task_id
+        self.text = text
+        self.completed = completed
+        self.set_priority(priority)
+        self.set_due(due)
+
+    def set_priority(self, priority):
+        self.priority = priority
+        self.rank = PRIORITY_RANK[priority]
+
+    def set_due(self, due):
+        self.due = due
+        self.due_ordinal = due.toordinal()
+
+    def display(self):
+        task_info = f"{self.text} | Priority: {self.priority} | Due: {self.due.strftime(DATE_FORMAT)}"
+        return task_info + " | Completed" if self.completed else task_info
+
+# Tasks added to the search index per slice of idle time after loading
+INDEX_BATCH_TASKS = 1000
+
+# Maps every three-character slice of each task's lowercased text to the ids of
+# the tasks containing it; a search intersects the sets of its query's slices.
+# Queries under three characters have no slice and scan the texts instead, which
+# costs little next to the share of tasks such short queries match
+class TrigramIndex:
+    def __init__(self):
+        self.texts = {}
+        self.postings = {}
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, task_id, text):
+        text = text.lower()
+        self.texts[task_id] = text
+        for trigram in self.trigrams(text):
+            self.postings.setdefault(trigram, set()).add(task_id)
+
+    def remove(self, task_id):
+        for trigram in self.trigrams(self.texts.pop(task_id)):
+            ids = self.postings[trigram]
+            ids.discard(task_id)
+            if not ids:
+                del self.postings[trigram]
+
+    def update(self, task_id, text):
+        self.remove(task_id)
+        self.add(task_id, text)
+
+    def search(self, query):
+        query = query.lower()
+        if len(query) < 3:
+            return {task_id for task_id, text in self.texts.items() if query in text}
+        candidates = sorted((self.postings.get(trigram, set()) for trigram in self.trigrams(query)), key=len)
+        ids = candidates[0].intersection(*candidates[1:])
+        # Sharing every trigram does not guarantee they appear in query order
+        return {task_id for task_id in ids if query in self.texts[task_id]}
+
+# Operations not yet folded into the database, one JSON record per line, kept next
+# to the database under the same name: tasks.db has tasks.journal
+JOURNAL_SUFFIX = '.journal'
+# Seconds the writer gathers operations before one write and fsync; at most this much is lost in a crash
+JOURNAL_DEBOUNCE_S = 0.5
+# Journal records that trigger a compaction into the database
+JOURNAL_COMPACT_RECORDS = 1000
+# Seconds between attempts after a failed write or compaction
+JOURNAL_RETRY_S = 1.0
+# Longest wait of a blocking sync, and of the final attempts when the app closes
+JOURNAL_SYNC_TIMEOUT_S = 10.0
+JOURNAL_CLOSE_TIMEOUT_S = 10.0
+
+def read_journal(path):
+    records = []
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A crash mid-write leaves a torn last line; everything before it is intact
+                    break
+    return records
+
+# Applies journal records to the database in one transaction; every operation is
+# idempotent, so replaying records that were already applied is harmless
+def apply_journal(connection, records):
+    with connection:
+        for record in records:
+            op = record['op']
+            if op == 'add':
+                connection.execute(
+                    'INSERT OR REPLACE INTO tasks (id, text, priority, priority_rank, due_ordinal, completed) '
+                    'VALUES (?, ?, ?, ?, ?, ?)', (record['id'], record['text'], record['priority'],
+                                                  PRIORITY_RANK[record['priority']], record['due'],
+                                                  int(record['completed'])))
+            elif op == 'edit':
+                connection.execute('UPDATE tasks SET text = ? WHERE id = ?', (record['text'], record['id']))
+            elif op == 'complete':
+                connection.execute('UPDATE tasks SET completed = ? WHERE id = ?',
+                                   (int(record['completed']), record['id']))
+            elif op == 'delete':
+                connection.execute('DELETE FROM tasks WHERE id = ?', (record['id'],))
+            elif op == 'clear':
+                connection.execute('DELETE FROM tasks')
+
+# Append-only log of task operations written by a background thread. The UI only
+# queues records; the writer batches them for JOURNAL_DEBOUNCE_S, appends and
+# fsyncs them, and every JOURNAL_COMPACT_RECORDS records (or on sync and close)
+# folds them into the database, which is the snapshot, and empties the journal
+class TaskJournal:
+    def __init__(self, path, database, debounce=JOURNAL_DEBOUNCE_S,
+                 compact_records=JOURNAL_COMPACT_RECORDS):
+        self.path = path
+        self.database = database
+        self.debounce = debounce
+        self.compact_records = compact_records
+        # The last write or compaction failure, None once the writer has caught up
+        self.error = None
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name='task-journal', daemon=True)
+        self.thread.start()
+
+    def append(self, record):
+        self.queue.put(('record', record))
+
+    def sync(self, wait=False, timeout=JOURNAL_SYNC_TIMEOUT_S):
+        """Write and compact everything queued so far.
+
+        With ``wait``, block until that is done and return whether it was; a
+        writer that keeps failing (see ``error``) makes this False after ``timeout``.
+        """
+        done = threading.Event()
+        self.queue.put(('sync', done))
+        if not wait:
+            return False
+        return done.wait(timeout) and self.thread.is_alive()
+
+    def close(self):
+        self.queue.put(('stop', None))
+        self.thread.join()
+
+    def run(self):
+        connection = sqlite3.connect(self.database)
+        connection.execute('PRAGMA synchronous=NORMAL')
+        # Records not yet in the file, and records in the file not yet in the database;
+        # after a failure both are kept and retried, so nothing queued is dropped
+        unwritten, written, waiters = [], [], []
+        stop = False
+        stop_deadline = None
+        with open(self.path, 'a') as file:
+            while True:
+                retrying = bool(unwritten or written) and self.error is not None
+                try:
+                    kind, item = self.queue.get(timeout=JOURNAL_RETRY_S if retrying or stop else None)
+                except queue.Empty:
+                    kind = None
+                deadline = time.monotonic() + self.debounce
+                while kind is not None:
+                    if kind == 'record':
+                        unwritten.append(item)
+                    elif kind == 'sync':
+                        waiters.append(item)
+                    else:
+                        stop = True
+                        stop_deadline = time.monotonic() + JOURNAL_CLOSE_TIMEOUT_S
+                    if waiters or stop:
+                        break
+                    try:
+                        kind, item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        kind = None
+
+                try:
+                    if unwritten:
+                        start = file.tell()
+                        try:
+                            file.write(''.join(json.dumps(record) + '\n' for record in unwritten))
+                            file.flush()
+                            os.fsync(file.fileno())
+                        except Exception:
+                            # Cut off a partial write, or replay would stop at the torn line
+                            file.truncate(start)
+                            raise
+                        written.extend(unwritten)
+                        unwritten = []
+                    if written and (waiters or stop or len(written) >= self.compact_records):
+                        apply_journal(connection, written)
+                        file.truncate(0)
+                        os.fsync(file.fileno())
+                        written = []
+                    self.error = None
+                except Exception as error:
+                    # Typically "database is locked" or a full disk; try again shortly
+                    if self.error is None:
+                        logger.warning("Could not save changes, retrying: %s", error)
+                    self.error = error
+
+                if self.error is None:
+                    for done in waiters:
+                        done.set()
+                    waiters = []
+                if stop and (self.error is None or time.monotonic() >= stop_deadline):
+                    if self.error is not None:
+                        logger.error("Gave up saving, %d changes were not saved: %s", len(unwritten), self.error)
+                    break
+        connection.close()
+
+def journal_path(database):
+    return os.path.splitext(database)[0] + JOURNAL_SUFFIX
+
+def lock_database(path):
+    """Take the lock that lets one process at a time write ``path``, or return None if it is held.
+
+    The lock is an OS file lock on ``path + '.lock'``, so it is released when
+    the holder exits, even after a crash. Keep the returned file open to hold it.
+    """
+    lock_file = open(path + '.lock', 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+# Opens the task database, creating it (and importing the tasks.txt beside it) on
+# first use, and folds in what its journal recorded since the last compaction. The
+# caller must hold the database's lock, since the journal belongs to its writer
+def open_database(path=TASKS_DB):
+    connection = sqlite3.connect(path)
+    # WAL appends each change instead of rewriting pages, and readers never block the writer
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    if connection.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_IMPORTED:
+        import_text_file(connection, os.path.join(os.path.dirname(path), TASKS_TXT))
+    apply_journal(connection, read_journal(journal_path(path)))
+    open(journal_path(path), 'w').close()
+    return connection
+
+def import_text_file(connection, path):
+    """Copy the tasks of a tasks.txt file into the database, in one transaction.
+
+    Lines that do not parse are skipped and reported, so one bad line cannot
+    stop the import (and with it every later start of the app).
+    """
+    rows, skipped = [], []
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            for number, line in enumerate(file, 1):
+                if line.strip():
+                    try:
+                        text, priority, due_date, completed = parse_task_info(line.strip())
+                        due_date = datetime.datetime.strptime(due_date, DATE_FORMAT).date()
+                        rows.append((text, priority, PRIORITY_RANK[priority], due_date.toordinal(),
+                                     int(completed)))
+                    except (IndexError, KeyError, ValueError) as error:
+                        skipped.append(f"line {number}: {error!r}")
+    if skipped:
+        logger.warning("Skipped %d unreadable lines of %s: %s", len(skipped), path, "; ".join(skipped))
+    with connection:
+        connection.executemany(
+            'INSERT INTO tasks (text, priority, priority_rank, due_ordinal, completed) '
+            'VALUES (?, ?, ?, ?, ?)', rows)
+        connection.execute(f'PRAGMA user_version = {SCHEMA_IMPORTED}')
+
+# Rows validated and inserted, or fetched and written, per batch by the bulk import and export
+BULK_BATCH_ROWS = 10_000
+BULK_FIELDS = ['id', 'text', 'priority', 'due', 'completed']
+BULK_FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', ''}
+
+def bulk_format(path, fmt=None):
+    fmt = fmt or BULK_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in ('jsonl', 'csv'):
+        raise ValueError(f"Cannot tell the format of {path}; pass --format jsonl or csv")
+    return fmt
+
+def read_records(file, fmt):
+    """Yield (line number, record) pairs one at a time from a JSONL or CSV file."""
+    if fmt == 'csv':
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        for number, line in enumerate(file, 1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as error:
+                    raise ValueError(f"Line {number}: {error}") from None
+
+def task_row(number, record):
+    """Validate one imported record into a tasks table row."""
+    if not isinstance(record, dict):
+        raise ValueError(f"Line {number}: expected an object, got {type(record).__name__}")
+    try:
+        text = record['text']
+        priority = record['priority']
+        due = record['due']
+    except KeyError as error:
+        raise ValueError(f"Line {number}: missing field {error}") from None
+    if not isinstance(text, str) or not text:
+        raise ValueError(f"Line {number}: task text must be a non-empty string")
+    if not isinstance(priority, str) or priority not in PRIORITY_RANK:
+        raise ValueError(f"Line {number}: priority must be one of {', '.join(PRIORITIES)}")
+    try:
+        due_ordinal = datetime.datetime.strptime(due, DATE_FORMAT).toordinal()
+    except (TypeError, ValueError):
+        raise ValueError(f"Line {number}: due date {due!r} is not YYYY-MM-DD") from None
+    completed = record.get('completed', False)
+    if not isinstance(completed, bool):
+        flag = str(completed).strip().lower()
+        if flag not in TRUE_VALUES and flag not in FALSE_VALUES:
+            raise ValueError(f"Line {number}: completed must be true or false")
+        completed = flag in TRUE_VALUES
+    return text, priority, PRIORITY_RANK[priority], due_ordinal, int(completed)
+
+def import_tasks(connection, path, fmt=None):
+    """Stream tasks from a JSONL or CSV file into the database in one transaction.
+
+    Records get new ids. Any invalid record rolls the whole import back.
+    Returns the number of tasks imported.
+    """
+    fmt = bulk_format(path, fmt)
+    count = 0
+    with open(path, 'r', newline='') as file, connection:
+        records = read_records(file, fmt)
+        while True:
+            rows = [task_row(number, record) for number, record in itertools.islice(records, BULK_BATCH_ROWS)]
+            if not rows:
+                break
+            connection.executemany(
+                'INSERT INTO tasks (text, priority, priority_rank, due_ordinal, completed) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+            count += len(rows)
+    return count
+
+def export_tasks(connection, path, fmt=None):
+    """Stream every task from the database into a JSONL or CSV file; returns the count."""
+    fmt = bulk_format(path, fmt)
+    cursor = connection.execute('SELECT id, text, priority, due_ordinal, completed FROM tasks ORDER BY id')
+    count = 0
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(BULK_FIELDS)
+        while rows := cursor.fetchmany(BULK_BATCH_ROWS):
+            rows = [(task_id, text, priority, datetime.date.fromordinal(due_ordinal).isoformat(), bool(completed))
+                    for task_id, text, priority, due_ordinal, completed in rows]
+            if writer:
+                writer.writerows(rows)
+            else:
+                file.write(''.join(json.dumps(dict(zip(BULK_FIELDS, row))) + '\n' for row in rows))
+            count += len(rows)
+    return count
+
+# The tasks themselves, kept in memory for the view; every change is queued on the
+# journal and reaches SQLite through it. The Listbox only shows a filtered, ordered view
+class TaskStore:
+    def __init__(self, path=TASKS_DB):
+        # Ids are handed out from memory, so no other process may write the database meanwhile
+        self.lock_file = lock_database(path)
+        if self.lock_file is None:
+            raise RuntimeError(f"{path} is already open in another to-do list window")
+        self.connection = open_database(path)
+        self.tasks = {}
+        self.orders = {order: [] for order in SORT_KEYS}
+        self.index = TrigramIndex()
+        self.unindexed = collections.deque()
+        self.reset_filter_sets()
+        self.load()
+        self.journal = TaskJournal(journal_path(path), path)
+
+    def reset_filter_sets(self):
+        # Ids of the tasks with each status, priority and due bucket; a filtered view
+        # intersects the sets it needs instead of scanning every task
+        self.today = datetime.date.today().toordinal()
+        self.filter_sets = {
+            'status': {True: set(), False: set()},
+            'priority': {priority: set() for priority in PRIORITIES},
+            'due': {bucket: set() for bucket in DUE_BUCKETS},
+        }
+
+    def memberships(self, task):
+        return (('status', task.completed), ('priority', task.priority),
+                ('due', due_bucket(task.due_ordinal, self.today)))
+
+    def file_task(self, task):
+        for kind, value in self.memberships(task):
+            self.filter_sets[kind][value].add(task.id)
+
+    def unfile_task(self, task):
+        for kind, value in self.memberships(task):
+            self.filter_sets[kind][value].discard(task.id)
+
+    def load(self):
+        if hasattr(self, 'journal') and not self.journal.sync(wait=True):
+            # The database only has what the writer has compacted so far; reloading
+            # now would replace the unsaved changes with older data
+            raise RuntimeError(f"Recent changes are not saved yet: {self.journal.error}")
+        self.tasks = {}
+        self.index = TrigramIndex()
+        self.reset_filter_sets()
+        rows = self.connection.execute(
+            'SELECT id, text, priority, due_ordinal, completed FROM tasks ORDER BY id')
+        for task_id, text, priority, due_ordinal, completed in rows:
+            task = Task(task_id, text, priority, datetime.date.fromordinal(due_ordinal), bool(completed))
+            self.tasks[task_id] = task
+            self.file_task(task)
+        self.next_id = max(self.tasks, default=0) + 1
+        # The tasks in each view order, kept sorted as tasks come and go; no sort key
+        # changes after a task is added, so edits never move a task
+        self.orders = {order: sorted(self.tasks.values(), key=key) for order, key in SORT_KEYS.items()}
+        # Indexed a batch at a time by index_pending, so neither loading nor the first search pauses
+        self.unindexed = collections.deque(self.tasks)
+
+    def index_pending(self, limit=INDEX_BATCH_TASKS):
+        """Add up to ``limit`` more loaded tasks to the search index; returns whether any are left."""
+        for _ in range(min(limit, len(self.unindexed))):
+            task = self.tasks.get(self.unindexed.popleft())
+            if task is not None:
+                self.index.add(task.id, task.text)
+        return bool(self.unindexed)
+
+    def add(self, text, priority, due, completed=False):
+        task = Task(self.next_id, text, priority, due, completed)
+        self.next_id += 1
+        self.journal.append({'op': 'add', 'id': task.id, 'text': text, 'priority': priority,
+                             'due': task.due_ordinal, 'completed': completed})
+        self.tasks[task.id] = task
+        self.file_task(task)
+        for order, key in SORT_KEYS.items():
+            bisect.insort(self.orders[order], task, key=key)
+        self.index.add(task.id, text)
+        return task
+
+    def update(self, task_id, text=None, completed=None):
+        task = self.tasks[task_id]
+        if text is not None:
+            self.journal.append({'op': 'edit', 'id': task_id, 'text': text})
+            task.text = text
+            if task_id in self.index.texts:
+                self.index.update(task_id, text)
+        if completed is not None:
+            self.journal.append({'op': 'complete', 'id': task_id, 'completed': completed})
+            self.unfile_task(task)
+            task.completed = completed
+            self.file_task(task)
+        return task
+
+    def remove(self, task_id):
+        self.journal.append({'op': 'delete', 'id': task_id})
+        task = self.tasks.pop(task_id)
+        self.unfile_task(task)
+        for order, key in SORT_KEYS.items():
+            tasks = self.orders[order]
+            del tasks[bisect.bisect_left(tasks, key(task), key=key)]
+        if task_id in self.index.texts:
+            self.index.remove(task_id)
+
+    def clear(self):
+        self.journal.append({'op': 'clear'})
+        self.tasks.clear()
+        self.orders = {order: [] for order in SORT_KEYS}
+        self.index = TrigramIndex()
+        self.unindexed.clear()
+        self.reset_filter_sets()
+
+    def search(self, query):
+        """Ids of the tasks whose text contains ``query``, ignoring case."""
+        if self.unindexed:
+            # The index is still being built; scanning gives the same answer meanwhile
+            query = query.lower()
+            return {task.id for task in self.tasks.values() if query in task.text.lower()}
+        return self.index.search(query)
+
+    def checkpoint(self):
+        # Compact the journal in the background, then fold SQLite's write-ahead log back into the file
+        self.journal.sync()
+        self.connection.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def close(self):
+        self.journal.close()
+        self.connection.close()
+        self.lock_file.close()
+
+    def view(self, order='added', filters=None):
+        """Tasks in ``order``, limited to those matching every (kind, value) in ``filters``.
+
+        Unfiltered, this is the store's own sorted list, so it must not be modified.
+        """
+        if self.today != datetime.date.today().toordinal():
+            # The due buckets moved at midnight
+            tasks = list(self.tasks.values())
+            self.reset_filter_sets()
+            for task in tasks:
+                self.file_task(task)
+        chosen = [self.filter_sets[kind][value] for kind, value in (filters or {}).items() if value is not None]
+        if not chosen:
+            return self.orders[order]
+        chosen.sort(key=len)
+        ids = chosen[0].intersection(*chosen[1:])
+        return sorted((self.tasks[task_id] for task_id in ids), key=SORT_KEYS[order])
+
+# Time of day a reminder fires on a task's due date
+REMINDER_TIME = datetime.time(9, 0)
+# Longest single wait handed to after(), so a clock change or a sleeping machine is noticed
+REMINDER_MAX_WAIT_MS = 60 * 60 * 1000
+
+def reminder_time(task):
+    return datetime.datetime.combine(task.due, REMINDER_TIME).timestamp()
+
+# Min-heap of upcoming reminders. Only the earliest one is armed with after(); a
+# cancelled or moved reminder is left in the heap and skipped when it surfaces
+class ReminderScheduler:
+    def __init__(self, widget, on_due):
+        self.widget = widget
+        self.on_due = on_due
+        self.heap = []
+        self.scheduled = {}
+        self.armed = None
+        self.armed_at = None
+
+    def reset(self, tasks):
+        now = time.time()
+        self.scheduled = {task.id: reminder_time(task) for task in tasks
+                          if not task.completed and reminder_time(task) > now}
+        self.heap = [(when, task_id) for task_id, when in self.scheduled.items()]
+        heapq.heapify(self.heap)
+        self.arm()
+
+    def schedule(self, task):
+        when = reminder_time(task)
+        if task.completed or when <= time.time():
+            self.cancel(task.id)
+            return
+        self.scheduled[task.id] = when
+        heapq.heappush(self.heap, (when, task.id))
+        self.arm()
+
+    def cancel(self, task_id):
+        if self.scheduled.pop(task_id, None) is not None and len(self.heap) > 2 * len(self.scheduled) + 64:
+            # Mostly stale entries; rebuilding is cheaper than skipping them one by one
+            self.heap = [(when, task_id) for task_id, when in self.scheduled.items()]
+            heapq.heapify(self.heap)
+
+    def next_due(self):
+        while self.heap and self.scheduled.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def arm(self):
+        when = self.next_due()
+        if when is None or (self.armed is not None and self.armed_at <= when):
+            return
+        if self.armed is not None:
+            self.widget.after_cancel(self.armed)
+        wait = max(0, min(int((when - time.time()) * 1000), REMINDER_MAX_WAIT_MS))
+        self.armed, self.armed_at = self.widget.after(wait, self.fire), when
+
+    def fire(self):
+        self.armed = self.armed_at = None
+        now = time.time()
+        due = []
+        while (when := self.next_due()) is not None and when <= now:
+            due.append(heapq.heappop(self.heap)[1])
+            del self.scheduled[due[-1]]
+        if due:
+            self.on_due(due)
+        self.arm()
+
+# Row colors of the task list
+NORMAL_COLORS = {'bg': 'black', 'fg': 'white'}
+COMPLETED_COLORS = {'bg': 'darkgreen', 'fg': 'gray'}
+MATCH_COLORS = {'bg': 'yellow', 'fg': 'black'}
+
+# A fixed-height Listbox showing a window of rows over the task list; scrolling
+# moves the window, so only the visible rows ever exist as Listbox items. The
+# selection is kept as a task id, looked up with ``find`` when it is needed
+class VirtualTaskList:
+    def __init__(self, parent, find, width=80, height=15):
+        self.find = find
+        self.frame = tk.Frame(parent, bg='black')
+        self.listbox = tk.Listbox(self.frame, width=width, height=height, bg='black', fg='white',
+                                  exportselection=False)
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.scroll)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rows = height
+        self.tasks = []
+        self.top = 0
+        self.selected_id = None
+        self.matches = set()
+        self.listbox.bind('<<ListboxSelect>>', self.on_select)
+        self.listbox.bind('<MouseWheel>', self.on_wheel)
+        self.listbox.bind('<Button-4>', lambda event: self.scroll('scroll', -1, 'units'))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll('scroll', 1, 'units'))
+        # The Listbox would otherwise stop at its own first and last row
+        self.listbox.bind('<Up>', lambda event: self.move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self.move_selection(1))
+
+    def set_tasks(self, tasks):
+        self.tasks = tasks
+        self.render()
+
+    def color(self, task):
+        if task.id in self.matches:
+            return MATCH_COLORS
+        return COMPLETED_COLORS if task.completed else NORMAL_COLORS
+
+    def render(self):
+        self.top = max(0, min(self.top, len(self.tasks) - self.rows))
+        window = self.tasks[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(tk.END, *(task.display() for task in window))
+        for row, task in enumerate(window):
+            if task.completed or task.id in self.matches:
+                self.listbox.itemconfig(row, self.color(task))
+            if task.id == self.selected_id:
+                self.listbox.selection_set(row)
+        if self.tasks:
+            self.scrollbar.set(self.top / len(self.tasks), (self.top + len(window)) / len(self.tasks))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.top = int(float(amount) * len(self.tasks))
+        elif unit == 'pages':
+            self.top += int(amount) * (self.rows - 1)
+        else:
+            self.top += int(amount)
+        self.render()
+
+    def on_wheel(self, event):
+        self.scroll('scroll', -1 if event.delta > 0 else 1, 'units')
+        return 'break'
+
+    def on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected_id = self.tasks[self.top + selection[0]].id
+
+    def move_selection(self, step):
+        positions = [i for i, task in enumerate(self.tasks[self.top:self.top + self.rows])
+                     if task.id == self.selected_id]
+        if positions:
+            index = min(max(self.top + positions[0] + step, 0), len(self.tasks) - 1)
+            self.selected_id = self.tasks[index].id
+            if not self.top <= index < self.top + self.rows:
+                self.top = index if step < 0 else index - self.rows + 1
+            self.render()
+        return 'break'
+
+    def set_matches(self, matches):
+        # Only visible rows whose match state flipped are recolored
+        changed = self.matches ^ matches
+        self.matches = matches
+        for row, task in enumerate(self.tasks[self.top:self.top + self.rows]):
+            if task.id in changed:
+                self.listbox.itemconfig(row, self.color(task))
+
+    def selected(self):
+        """The selected task, even when scrolled out of view; IndexError if there is none."""
+        task = self.find(self.selected_id) if self.selected_id is not None else None
+        if task is None:
+            raise IndexError("no task is selected")
+        return task
+
+# What the task list shows: the sort order and a value (or None for any) per filter kind
+view_order = 'added'
+view_filters = {'status': None, 'priority': None, 'due': None}
+
+# Function to redraw the task list from the store
+def refresh_view():
+    task_view.set_tasks(store.view(view_order, view_filters))
+
+def selected_task():
+    return task_view.selected()
 
 # Function to add a task
 def add_task():
@@ -9,12 +767,12 @@ def add_task():
     priority = combo_priority.get()
     due_date = cal_due_date.get_date()
 
-    if not task or not priority:
+    if not task or priority not in PRIORITY_RANK:
         messagebox.showwarning("Warning", "Task and Priority are required.")
         return
 
-    task_info = f"{task} | Priority: {priority} | Due: {due_date.strftime('%Y-%m-%d')}"
-    listbox_tasks.insert(tk.END, task_info)
+    reminders.schedule(store.add(task, priority, due_date))
+    refresh_view()
     clear_task_entry()
 
 def clear_task_entry():
@@ -25,106 +783,154 @@ def clear_task_entry():
 # Function to delete a selected task
 def delete_task():
     try:
-        selected_task_index = listbox_tasks.curselection()[0]
-        listbox_tasks.delete(selected_task_index)
+        task_id = selected_task().id
+        store.remove(task_id)
+        reminders.cancel(task_id)
+        refresh_view()
     except IndexError:
         messagebox.showwarning("Warning", "You must select a task to delete.")
 
 # Function to edit a selected task
 def edit_task():
     try:
-        selected_task_index = listbox_tasks.curselection()[0]
-        current_task = listbox_tasks.get(selected_task_index)
-        task, priority, due_date = parse_task_info(current_task)
-
-        new_task = simpledialog.askstring("Edit Task", "Enter new task:", initialvalue=task)
+        task = selected_task()
+        new_task = simpledialog.askstring("Edit Task", "Enter new task:", initialvalue=task.text)
         if new_task:
-            listbox_tasks.delete(selected_task_index)
-            new_task_info = f"{new_task} | Priority: {priority} | Due: {due_date}"
-            listbox_tasks.insert(selected_task_index, new_task_info)
+            store.update(task.id, text=new_task)
+            refresh_view()
     except IndexError:
         messagebox.showwarning("Warning", "You must select a task to edit.")
 
 # Function to mark a task as completed
 def mark_completed():
     try:
-        selected_task_index = listbox_tasks.curselection()[0]
-        task = listbox_tasks.get(selected_task_index)
-        listbox_tasks.delete(selected_task_index)
-        listbox_tasks.insert(tk.END, task, {'bg': 'darkgreen', 'fg': 'gray', 'font': ('Arial', 12, 'italic')})
+        reminders.schedule(store.update(selected_task().id, completed=True))
+        refresh_view()
     except IndexError:
         messagebox.showwarning("Warning", "You must select a task to mark as completed.")
 
-# Function to save tasks to a file
+# Function to save tasks; changes are already saved automatically, so this only compacts the journal
 def save_tasks():
-    with open('tasks.txt', 'w') as file:
-        for task in listbox_tasks.get(0, tk.END):
-            file.write(task + '\n')
-    messagebox.showinfo("Info", "Tasks saved to tasks.txt")
+    store.checkpoint()
+    if store.journal.error is not None:
+        messagebox.showwarning("Warning", f"Saving is failing and will be retried: {store.journal.error}")
+    else:
+        messagebox.showinfo("Info", f"Tasks are saved automatically to {TASKS_DB}")
 
-# Function to load tasks from a file
+# Function to write out pending changes before the window closes
+def close_app():
+    store.close()
+    root.destroy()
+
+# Function to load tasks from the database
 def load_tasks():
     try:
-        with open('tasks.txt', 'r') as file:
-            tasks = file.readlines()
-            listbox_tasks.delete(0, tk.END)
-            for task in tasks:
-                listbox_tasks.insert(tk.END, task.strip())
-    except FileNotFoundError:
-        messagebox.showwarning("Warning", "No saved tasks found.")
+        store.load()
+    except RuntimeError as error:
+        messagebox.showwarning("Warning", str(error))
+        return
+    reminders.reset(store.tasks.values())
+    refresh_view()
+    start_indexing()
 
 # Function to clear all tasks
 def clear_tasks():
-    listbox_tasks.delete(0, tk.END)
+    store.clear()
+    reminders.reset([])
+    refresh_view()
+
+# Milliseconds between checks for logged warnings to show
+WARNING_POLL_MS = 500
+
+# Collects logged warnings from any thread; the window shows them from its own thread
+class WarningQueue(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = queue.Queue()
+
+    def emit(self, record):
+        self.messages.put(self.format(record))
+
+# Function to show the warnings logged since the last check
+def show_warnings():
+    messages = []
+    while True:
+        try:
+            messages.append(warning_queue.messages.get_nowait())
+        except queue.Empty:
+            break
+    if messages:
+        messagebox.showwarning("Warning", "\n\n".join(messages))
+    root.after(WARNING_POLL_MS, show_warnings)
+
+# Pending after() call that adds the next batch of loaded tasks to the search index
+index_job = None
+
+# Function to build the search index a batch at a time, between other UI events
+def index_tasks():
+    global index_job
+    index_job = root.after(1, index_tasks) if store.index_pending() else None
+
+def start_indexing():
+    global index_job
+    if index_job is None:
+        index_job = root.after(1, index_tasks)
 
 # Function to search for tasks
 def search_tasks():
-    query = entry_search.get().lower()
-    for i in range(listbox_tasks.size()):
-        task = listbox_tasks.get(i).lower()
-        listbox_tasks.itemconfig(i, {'bg': 'black', 'fg': 'white'})
-        if query in task:
-            listbox_tasks.itemconfig(i, {'bg': 'yellow', 'fg': 'black'})
+    query = entry_search.get()
+    # Matches are remembered, and colored as their rows scroll into view
+    task_view.set_matches(store.search(query) if query else set())
+
+# Function to show the tasks whose reminders fired
+def remind(task_ids):
+    tasks = [store.tasks[task_id] for task_id in task_ids if task_id in store.tasks]
+    if tasks:
+        root.bell()
+        messagebox.showinfo("Reminder", "Due today:\n" + "\n".join(task.display() for task in tasks))
 
 # Function to parse task info
 def parse_task_info(task_info):
     parts = task_info.split(" | ")
-    task = parts[0]
-    priority = parts[1].split(": ")[1]
-    due_date = parts[2].split(": ")[1]
-    return task, priority, due_date
+    completed = len(parts) > 3 and parts[-1] == "Completed"
+    if completed:
+        parts.pop()
+    # The fields are read from the right, since the task text may itself contain " | "
+    task = " | ".join(parts[:-2])
+    priority = parts[-2].split(": ")[1]
+    due_date = parts[-1].split(": ")[1]
+    return task, priority, due_date, completed
 
 # Function to sort tasks by priority
 def sort_tasks_by_priority():
-    tasks = listbox_tasks.get(0, tk.END)
-    tasks_sorted = sorted(tasks, key=lambda x: x.split(" | ")[1].split(": ")[1])
-    listbox_tasks.delete(0, tk.END)
-    for task in tasks_sorted:
-        listbox_tasks.insert(tk.END, task)
+    global view_order
+    view_order = 'priority'
+    refresh_view()
 
 # Function to sort tasks by due date
 def sort_tasks_by_due_date():
-    tasks = listbox_tasks.get(0, tk.END)
-    tasks_sorted = sorted(tasks, key=lambda x: datetime.datetime.strptime(x.split(" | ")[2].split(": ")[1], '%Y-%m-%d'))
-    listbox_tasks.delete(0, tk.END)
-    for task in tasks_sorted:
-        listbox_tasks.insert(tk.END, task)
+    global view_order
+    view_order = 'due'
+    refresh_view()
+
+# Function to filter the view by one kind of membership; filters of different kinds combine
+def set_filter(kind, value):
+    view_filters[kind] = value
+    refresh_view()
 
 # Function to filter completed tasks
 def filter_completed_tasks():
-    tasks = listbox_tasks.get(0, tk.END)
-    listbox_tasks.delete(0, tk.END)
-    for task in tasks:
-        if 'completed' in task.lower():
-            listbox_tasks.insert(tk.END, task)
+    set_filter('status', True)
 
 # Function to filter incomplete tasks
 def filter_incomplete_tasks():
-    tasks = listbox_tasks.get(0, tk.END)
-    listbox_tasks.delete(0, tk.END)
-    for task in tasks:
-        if 'completed' not in task.lower():
-            listbox_tasks.insert(tk.END, task)
+    set_filter('status', False)
+
+# Function to show every task again
+def show_all_tasks():
+    for kind in view_filters:
+        view_filters[kind] = None
+    refresh_view()
 
 # Function to manage tasks
 def manage_tasks():
@@ -144,60 +950,140 @@ def manage_tasks():
     button_filter_incomplete = tk.Button(manage_window, text="Show Incomplete Tasks", command=filter_incomplete_tasks, bg='#1e1e1e', fg='white')
     button_filter_incomplete.pack(pady=5)
 
-# Set up the main window
-root = tk.Tk()
-root.title("Enhanced To-Do List Application")
-root.configure(bg='black')
+    combo_filter_priority = ttk.Combobox(manage_window, values=['Any priority'] + PRIORITIES, width=14, state='readonly')
+    combo_filter_priority.set(view_filters['priority'] or 'Any priority')
+    combo_filter_priority.bind('<<ComboboxSelected>>', lambda event: set_filter(
+        'priority', combo_filter_priority.get() if combo_filter_priority.get() in PRIORITY_RANK else None))
+    combo_filter_priority.pack(pady=5)
+
+    combo_filter_due = ttk.Combobox(manage_window, values=['Any due date'] + DUE_BUCKETS, width=14, state='readonly')
+    combo_filter_due.set(view_filters['due'] or 'Any due date')
+    combo_filter_due.bind('<<ComboboxSelected>>', lambda event: set_filter(
+        'due', combo_filter_due.get() if combo_filter_due.get() in DUE_BUCKETS else None))
+    combo_filter_due.pack(pady=5)
 
-# Create and pack the widgets
-frame_tasks = tk.Frame(root, bg='black')
-frame_tasks.pack(pady=10)
+    def show_all():
+        show_all_tasks()
+        combo_filter_priority.set('Any priority')
+        combo_filter_due.set('Any due date')
+
+    button_show_all = tk.Button(manage_window, text="Show All Tasks", command=show_all, bg='#1e1e1e', fg='white')
+    button_show_all.pack(pady=5)
+
+# Command line: with no command the app opens its window; import and export run headless
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Enhanced To-Do List Application")
+    commands = parser.add_subparsers(dest='command')
+    for command, help_text in (('import', "add the tasks of a JSONL or CSV file"),
+                               ('export', "write every task to a JSONL or CSV file")):
+        bulk = commands.add_parser(command, help=help_text)
+        bulk.add_argument('path')
+        bulk.add_argument('--format', choices=['jsonl', 'csv'], help="default: from the file extension")
+        bulk.add_argument('--database', default=TASKS_DB)
+    return parser.parse_args(argv)
+
+def run_bulk(args):
+    lock_file = lock_database(args.database)
+    if lock_file is None:
+        raise SystemExit(f"{args.database} is open in the to-do list window; close it first")
+    connection = open_database(args.database)
+    start = time.perf_counter()
+    try:
+        if args.command == 'import':
+            count = import_tasks(connection, args.path, args.format)
+        else:
+            count = export_tasks(connection, args.path, args.format)
+    except ValueError as error:
+        raise SystemExit(f"{args.command} failed, nothing was changed: {error}")
+    finally:
+        connection.close()
+        lock_file.close()
+    print(f"{args.command}ed {count} tasks in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    logging.basicConfig(format='%(levelname)s: %(message)s')
+    args = parse_args()
+    if args.command:
+        run_bulk(args)
+        raise SystemExit
+
+    # The date picker is only needed by the window
+    from tkcalendar import DateEntry
+
+    # Warnings from opening the database on are shown once the window is up
+    warning_queue = WarningQueue()
+    logger.addHandler(warning_queue)
+
+    # Open the task database
+    try:
+        store = TaskStore()
+    except RuntimeError as error:
+        raise SystemExit(str(error))
+
+    # Set up the main window
+    root = tk.Tk()
+    root.title("Enhanced To-Do List Application")
+    root.configure(bg='black')
+    root.protocol("WM_DELETE_WINDOW", close_app)
+
+    # Create and pack the widgets
+    frame_tasks = tk.Frame(root, bg='black')
+    frame_tasks.pack(pady=10)
+
+    entry_task = tk.Entry(frame_tasks, width=40, bg='#333333', fg='white')
+    entry_task.pack(side=tk.LEFT, padx=10)
+
+    combo_priority = ttk.Combobox(frame_tasks, values=PRIORITIES, width=8)
+    combo_priority.set('Low')
+    combo_priority.pack(side=tk.LEFT, padx=10)
 
-entry_task = tk.Entry(frame_tasks, width=40, bg='#333333', fg='white')
-entry_task.pack(side=tk.LEFT, padx=10)
+    cal_due_date = DateEntry(frame_tasks, width=12, background='darkblue', foreground='white', borderwidth=2)
+    cal_due_date.pack(side=tk.LEFT, padx=10)
 
-combo_priority = ttk.Combobox(frame_tasks, values=['Low', 'Medium', 'High'], width=8)
-combo_priority.set('Low')
-combo_priority.pack(side=tk.LEFT, padx=10)
+    button_add_task = tk.Button(frame_tasks, text="Add Task", command=add_task, bg='#4caf50', fg='white')
+    button_add_task.pack(side=tk.LEFT)
 
-cal_due_date = DateEntry(frame_tasks, width=12, background='darkblue', foreground='white', borderwidth=2)
-cal_due_date.pack(side=tk.LEFT, padx=10)
+    button_frame = tk.Frame(root, bg='black')
+    button_frame.pack(pady=10)
 
-button_add_task = tk.Button(frame_tasks, text="Add Task", command=add_task, bg='#4caf50', fg='white')
-button_add_task.pack(side=tk.LEFT)
+    button_edit_task = tk.Button(button_frame, text="Edit Task", command=edit_task, bg='#1e1e1e', fg='white')
+    button_edit_task.pack(side=tk.LEFT, padx=5, pady=5)
 
-button_frame = tk.Frame(root, bg='black')
-button_frame.pack(pady=10)
+    button_mark_completed = tk.Button(button_frame, text="Mark as Completed", command=mark_completed, bg='#1e1e1e', fg='white')
+    button_mark_completed.pack(side=tk.LEFT, padx=5, pady=5)
 
-button_edit_task = tk.Button(button_frame, text="Edit Task", command=edit_task, bg='#1e1e1e', fg='white')
-button_edit_task.pack(side=tk.LEFT, padx=5, pady=5)
+    button_delete_task = tk.Button(button_frame, text="Delete Task", command=delete_task, bg='#f44336', fg='white')
+    button_delete_task.pack(side=tk.LEFT, padx=5, pady=5)
 
-button_mark_completed = tk.Button(button_frame, text="Mark as Completed", command=mark_completed, bg='#1e1e1e', fg='white')
-button_mark_completed.pack(side=tk.LEFT, padx=5, pady=5)
+    button_clear_tasks = tk.Button(button_frame, text="Clear All Tasks", command=clear_tasks, bg='#1e1e1e', fg='white')
+    button_clear_tasks.pack(side=tk.LEFT, padx=5, pady=5)
 
-button_delete_task = tk.Button(button_frame, text="Delete Task", command=delete_task, bg='#f44336', fg='white')
-button_delete_task.pack(side=tk.LEFT, padx=5, pady=5)
+    button_save_tasks = tk.Button(button_frame, text="Save Tasks", command=save_tasks, bg='#1e1e1e', fg='white')
+    button_save_tasks.pack(side=tk.LEFT, padx=5, pady=5)
 
-button_clear_tasks = tk.Button(button_frame, text="Clear All Tasks", command=clear_tasks, bg='#1e1e1e', fg='white')
-button_clear_tasks.pack(side=tk.LEFT, padx=5, pady=5)
+    button_load_tasks = tk.Button(button_frame, text="Load Tasks", command=load_tasks, bg='#1e1e1e', fg='white')
+    button_load_tasks.pack(side=tk.LEFT, padx=5, pady=5)
 
-button_save_tasks = tk.Button(button_frame, text="Save Tasks", command=save_tasks, bg='#1e1e1e', fg='white')
-button_save_tasks.pack(side=tk.LEFT, padx=5, pady=5)
+    entry_search = tk.Entry(root, width=50, bg='#333333', fg='white')
+    entry_search.pack(pady=5)
+    # Search as you type
+    entry_search.bind('<KeyRelease>', lambda event: search_tasks())
 
-button_load_tasks = tk.Button(button_frame, text="Load Tasks", command=load_tasks, bg='#1e1e1e', fg='white')
-button_load_tasks.pack(side=tk.LEFT, padx=5, pady=5)
+    button_search_tasks = tk.Button(root, text="Search Tasks", command=search_tasks, bg='#1e1e1e', fg='white')
+    button_search_tasks.pack(pady=5)
 
-entry_search = tk.Entry(root, width=50, bg='#333333', fg='white')
-entry_search.pack(pady=5)
+    button_manage_tasks = tk.Button(root, text="Manage Tasks", command=manage_tasks, bg='#1e1e1e', fg='white')
+    button_manage_tasks.pack(pady=5)
 
-button_search_tasks = tk.Button(root, text="Search Tasks", command=search_tasks, bg='#1e1e1e', fg='white')
-button_search_tasks.pack(pady=5)
+    task_view = VirtualTaskList(root, lambda task_id: store.tasks.get(task_id), width=80, height=15)
+    task_view.frame.pack(pady=(0, 10))
 
-button_manage_tasks = tk.Button(root, text="Manage Tasks", command=manage_tasks, bg='#1e1e1e', fg='white')
-button_manage_tasks.pack(pady=5)
+    refresh_view()
 
-listbox_tasks = tk.Listbox(root, width=80, height=15, bg='black', fg='white')
-listbox_tasks.pack(pady=(0, 10))
+    reminders = ReminderScheduler(root, remind)
+    reminders.reset(store.tasks.values())
+    start_indexing()
+    show_warnings()
 
-# Start the GUI event loop
-root.mainloop()
+    # Start the GUI event loop
+    root.mainloop()
@@ -0,0 +1,63 @@
+"""Offline benchmark of Translator.py's batch translation.
+
+Translates synthetic segments through a FakeBackend that adds latency, first
+one at a time and then with ``translate_batch`` at several worker counts, and
+prints the throughput of each run:
+
+    python TRANSLATOR_BENCHMARK.py --segments 200 --latency 0.2 --workers 1 4 8 16 --rate-limit 50
+"""
+import argparse
+import time
+
+from Translator import FakeBackend, TranslationCache, TranslationEngine
+
+
+def make_engine(args, workers: int) -> TranslationEngine:
+    # A fresh in-memory cache per run, so no run is served by an earlier one
+    backend = FakeBackend(args.latency, args.jitter, args.failure_rate, args.seed)
+    return TranslationEngine(None, cache=TranslationCache(":memory:"), backend=backend,
+                             max_workers=workers, rate_limit=args.rate_limit, timeout=args.timeout)
+
+
+def segments(count: int, duplicates: float):
+    unique = max(1, round(count * (1 - duplicates)))
+    return [f"Segment number {number % unique} of the benchmark text." for number in range(count)]
+
+
+def report(label: str, texts, results, seconds: float):
+    failed = sum(result == text for text, result in zip(texts, results))
+    print(f"{label:>12} {seconds:>10.2f} {len(texts) / seconds:>12.1f} {failed:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=200, help="segments per run")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="share of repeated segments")
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.05, help="random +/- seconds added to the latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-request timeout in seconds")
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="requests per second")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16], help="pool sizes to compare")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-sequential", action="store_true", help="skip the one-at-a-time run")
+    args = parser.parse_args()
+
+    texts = segments(args.segments, args.duplicates)
+    print(f"{'run':>12} {'seconds':>10} {'segments/s':>12} {'failed':>8}")
+    if not args.skip_sequential:
+        engine = make_engine(args, 1)
+        start = time.perf_counter()
+        results = [engine.translate(text, "en", "ur") for text in texts]
+        report("sequential", texts, results, time.perf_counter() - start)
+        engine.close()
+    for workers in args.workers:
+        engine = make_engine(args, workers)
+        start = time.perf_counter()
+        results = engine.translate_batch(texts, "en", "ur")
+        report(f"{workers} workers", texts, results, time.perf_counter() - start)
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
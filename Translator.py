@@ -1,13 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import hashlib
 import json
+import math
+import queue
+import random
 import re
+import sqlite3
 import threading
-from typing import Dict, List
-from googletrans import Translator, LANGUAGES
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 
 class LanguageData:
     def __init__(self):
+        # googletrans is only needed by the window, so the engine runs offline without it
+        from googletrans import LANGUAGES
         self.languages = LANGUAGES
         self.translations = self.load_translations()
 
@@ -43,18 +54,297 @@ class LanguageData:
     def get_language_code(self, name: str) -> str:
         return next((code for code, lang in self.languages.items() if lang.capitalize() == name), "en")
 
+CACHE_DB = "translation_cache.db"
+CACHE_MEMORY_ENTRIES = 1024
+CACHE_MAX_DISK_ENTRIES = 100_000
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+# Disk writes between sweeps of expired and excess entries
+CACHE_TRIM_INTERVAL = 500
+# Cache hits whose last_used times are gathered before one disk update
+CACHE_TOUCH_BATCH = 100
+
+CacheKey = Tuple[str, str, str]
+
+class TranslationCache:
+    """Translations keyed by (normalized text, source, target).
+
+    An in-memory LRU answers repeats without I/O; behind it a SQLite table keeps
+    translations across restarts. Entries expire after ``ttl`` seconds and the
+    least recently used ones are evicted from each tier when it is full.
+    """
+
+    def __init__(self, path: str = CACHE_DB, memory_entries: int = CACHE_MEMORY_ENTRIES,
+                 max_disk_entries: int = CACHE_MAX_DISK_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.memory: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+        self.memory_hits = self.disk_hits = self.misses = 0
+        self.writes = 0
+        # last_used times of hits not yet written to disk, so the disk trim sees entries
+        # that are only ever served from memory as recently used
+        self.touched: Dict[CacheKey, float] = {}
+        # Auto-translate runs outside the Tk thread, so both tiers are guarded by one lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (text, source, target)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used);
+        """)
+
+    @staticmethod
+    def key(text: str, source_lang: str, target_lang: str) -> CacheKey:
+        # Texts that differ only in Unicode form or runs of whitespace share an entry
+        return " ".join(unicodedata.normalize("NFC", text).split()), source_lang, target_lang
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                self._touch(key, now)
+                return entry[0]
+            if entry is not None:
+                del self.memory[key]
+            row = self.connection.execute(
+                "SELECT translation, created FROM translations WHERE text = ? AND source = ? AND target = ?",
+                key).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.misses += 1
+                return None
+            self._touch(key, now)
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+            return row[0]
+
+    def put(self, key: CacheKey, translation: str):
+        now = time.time()
+        with self.lock:
+            self._remember(key, translation, now)
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                    key + (translation, now, now))
+            self.touched.pop(key, None)
+            self.writes += 1
+            if self.writes % CACHE_TRIM_INTERVAL == 0:
+                self._trim_disk(now)
+
+    def _remember(self, key: CacheKey, translation: str, created: float):
+        self.memory[key] = (translation, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _touch(self, key: CacheKey, now: float):
+        self.touched[key] = now
+        if len(self.touched) >= CACHE_TOUCH_BATCH:
+            self._write_touches()
+
+    def _write_touches(self):
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE translations SET last_used = ? WHERE text = ? AND source = ? AND target = ?",
+                [(when,) + key for key, when in self.touched.items()])
+        self.touched.clear()
+
+    def flush(self):
+        """Write the last_used times of recent hits to disk."""
+        with self.lock:
+            self._write_touches()
+
+    def _trim_disk(self, now: float):
+        self._write_touches()
+        with self.connection:
+            self.connection.execute("DELETE FROM translations WHERE created <= ?", (now - self.ttl,))
+            self.connection.execute(
+                "DELETE FROM translations WHERE last_used <= (SELECT last_used FROM translations "
+                "ORDER BY last_used DESC LIMIT 1 OFFSET ?)", (self.max_disk_entries,))
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            disk_entries = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "memory_entries": len(self.memory), "disk_entries": disk_entries}
+
+TRANSLATE_WORKERS = 8
+# Requests per second sent to the backend, shared by all workers
+TRANSLATE_RATE_LIMIT = 10.0
+TRANSLATE_TIMEOUT_S = 10.0
+# Extra seconds a batch waits for its results beyond the workers' and rate limit's share,
+# in case a backend does not honor its own timeout
+TRANSLATE_RESULT_SLACK_S = 1.0
+# Quiet time after the last edit before auto-translate sends the text
+AUTO_TRANSLATE_DEBOUNCE_MS = 400
+# How often the window checks for finished translations while any are in flight
+TRANSLATION_POLL_MS = 50
+
+class TranslationBackend(ABC):
+    """Something that translates one text; raises on failure, including timeouts."""
+
+    @abstractmethod
+    def translate(self, text: str, source_lang: str, target_lang: str, timeout: float) -> str:
+        ...
+
+class GoogleBackend(TranslationBackend):
+    def __init__(self):
+        from googletrans import Translator
+        self.client_class = Translator
+        # googletrans clients are not thread-safe, so each worker thread gets its own
+        self.local = threading.local()
+
+    def translate(self, text: str, source_lang: str, target_lang: str, timeout: float) -> str:
+        translator = getattr(self.local, "translator", None)
+        if translator is None or self.local.timeout != timeout:
+            translator = self.local.translator = self.client_class(timeout=timeout)
+            self.local.timeout = timeout
+        return translator.translate(text, src=source_lang, dest=target_lang).text
+
+class FakeBackend(TranslationBackend):
+    """Offline stand-in that tags the text after a simulated network delay."""
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def translate(self, text: str, source_lang: str, target_lang: str, timeout: float) -> str:
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.failure_rate
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"no response within {timeout:.1f}s")
+        time.sleep(delay)
+        if failed:
+            raise ConnectionError("simulated backend failure")
+        return f"[{target_lang}] {text}"
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` acquisitions per second, in bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 class TranslationEngine:
-    def __init__(self, language_data: LanguageData):
+    def __init__(self, language_data: LanguageData, cache: Optional[TranslationCache] = None,
+                 backend: Optional[TranslationBackend] = None, max_workers: int = TRANSLATE_WORKERS,
+                 rate_limit: float = TRANSLATE_RATE_LIMIT, timeout: float = TRANSLATE_TIMEOUT_S):
         self.language_data = language_data
-        self.translator = Translator()
+        self.cache = cache if cache is not None else TranslationCache()
+        self.backend = backend if backend is not None else GoogleBackend()
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_limit, burst=max_workers)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+    def _fetch(self, text: str, source_lang: str, target_lang: str) -> str:
+        self.rate_limiter.acquire()
+        return self.backend.translate(text, source_lang, target_lang, self.timeout)
 
     def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        return self.translate_requests([(text, source_lang, target_lang)])[0]
+
+    def submit(self, text: str, source_lang: str, target_lang: str) -> Future:
+        """Translate one text on the pool without waiting; the result is as from ``translate``.
+
+        Each call runs on its own pool thread, so a new request never waits
+        behind an older one that is still in flight.
+        """
+        return self.pool.submit(self._translate_one, text, source_lang, target_lang)
+
+    def _translate_one(self, text: str, source_lang: str, target_lang: str) -> str:
+        key = self.cache.key(text, source_lang, target_lang)
+        translation = self.cache.get(key)
+        if translation is not None:
+            return translation
         try:
-            translation = self.translator.translate(text, src=source_lang, dest=target_lang)
-            return translation.text
+            translation = self._fetch(text, source_lang, target_lang)
         except Exception as e:
             print(f"Translation error: {e}")
             return text
+        self.cache.put(key, translation)
+        return translation
+
+    def translate_batch(self, texts: Sequence[str], source_lang: str, target_lang: str) -> List[str]:
+        """Translate many segments into one language; results are in input order."""
+        return self.translate_requests([(text, source_lang, target_lang) for text in texts])
+
+    def translate_many(self, text: str, source_lang: str, target_langs: Sequence[str]) -> Dict[str, str]:
+        """Translate one text into several languages."""
+        results = self.translate_requests([(text, source_lang, target) for target in target_langs])
+        return dict(zip(target_langs, results))
+
+    def translate_requests(self, requests: Sequence[Tuple[str, str, str]]) -> List[str]:
+        """Translate (text, source, target) requests concurrently; results are in input order.
+
+        Cached requests are answered directly and repeated ones are sent once.
+        The rest go to the backend from at most ``max_workers`` threads, within
+        the rate limit, each bounded by ``timeout``. A failed or timed-out
+        request returns its original text and is not cached, so a later call
+        tries again.
+        """
+        results: List[Optional[str]] = [None] * len(requests)
+        pending: Dict[CacheKey, List[int]] = {}
+        for position, (text, source_lang, target_lang) in enumerate(requests):
+            key = self.cache.key(text, source_lang, target_lang)
+            if key in pending:
+                pending[key].append(position)
+                continue
+            results[position] = self.cache.get(key)
+            if results[position] is None:
+                pending[key] = [position]
+        futures = {key: self.pool.submit(self._fetch, *requests[positions[0]])
+                   for key, positions in pending.items()}
+        # Each request waits its turn for a worker and the rate limit, then takes at most timeout
+        deadline = (time.monotonic() + math.ceil(len(futures) / self.max_workers) * self.timeout
+                    + len(futures) / self.rate_limiter.rate + TRANSLATE_RESULT_SLACK_S)
+        for key, future in futures.items():
+            try:
+                translation = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception as e:
+                future.cancel()
+                print(f"Translation error: {e or type(e).__name__}")
+                for position in pending[key]:
+                    results[position] = requests[position][0]
+                continue
+            self.cache.put(key, translation)
+            for position in pending[key]:
+                results[position] = translation
+        return results
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.cache.flush()
 
 class ProfessionalTranslator:
     def __init__(self, root):
@@ -73,7 +363,16 @@ class ProfessionalTranslator:
         self.source_lang = tk.StringVar(value="English")
         self.target_lang = tk.StringVar(value="Urdu")
         self.auto_translate_var = tk.BooleanVar(value=True)
-        self.auto_translate_thread = None
+        # Translations run on the engine's pool; each request gets a new generation and
+        # only the latest generation's result is shown, so stale responses are dropped.
+        # Pool threads never call Tk: finished requests are queued and polled from the Tk thread
+        self.pending_request = None
+        self.finished = queue.Queue()
+        self.in_flight = 0
+        self.poll_id = None
+        self.debounce_id = None
+        self.generation = 0
+        self.last_request_hash = None
 
         self.create_widgets()
         self.create_menu()
@@ -118,6 +417,9 @@ class ProfessionalTranslator:
         source_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
         self.source_text = tk.Text(source_frame, wrap=tk.WORD, height=10, bg="#1E1E1E", fg="#D3D3D3", insertbackground="#D3D3D3")
         self.source_text.pack(fill=tk.BOTH, expand=True)
+        self.source_text.bind("<<Modified>>", self.on_source_modified)
+        self.source_lang_combo.bind("<<ComboboxSelected>>", lambda event: self.schedule_auto_translate())
+        self.target_lang_combo.bind("<<ComboboxSelected>>", lambda event: self.schedule_auto_translate())
 
         target_frame = ttk.LabelFrame(text_frame, text="Translated Text", padding="5")
         target_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
@@ -151,17 +453,73 @@ class ProfessionalTranslator:
         edit_menu.add_command(label="Paste", command=self.paste_text)
         edit_menu.add_separator()
         edit_menu.add_command(label="Clear All", command=self.clear_text)
+        edit_menu.add_command(label="Cache Statistics", command=self.show_cache_stats)
 
-    def translate_text(self):
+    def translate_text(self, force: bool = True):
+        """Send the source text to the engine's pool; unless ``force``, skip text already sent."""
         text = self.source_text.get("1.0", tk.END).strip()
-        if not text:
-            return
         source_lang_code = self.language_data.get_language_code(self.source_lang.get())
         target_lang_code = self.language_data.get_language_code(self.target_lang.get())
-        translated_text = self.translation_engine.translate(text, source_lang_code, target_lang_code)
+        request_hash = hashlib.blake2b(f"{source_lang_code}\0{target_lang_code}\0{text}".encode(),
+                                       digest_size=16).digest()
+        if request_hash == self.last_request_hash and not force:
+            return
+        self.last_request_hash = request_hash
+        self.generation += 1
+        if self.pending_request is not None:
+            # Not started yet; one already sent finishes on its own thread and is ignored
+            self.pending_request.cancel()
+            self.pending_request = None
+        if not text:
+            return
+        generation = self.generation
+        self.pending_request = self.translation_engine.submit(text, source_lang_code, target_lang_code)
+        self.in_flight += 1
+        self.pending_request.add_done_callback(lambda future: self.finished.put((generation, future)))
+        if self.poll_id is None:
+            self.poll_id = self.root.after(TRANSLATION_POLL_MS, self.poll_translations)
+
+    def poll_translations(self):
+        self.poll_id = None
+        while True:
+            try:
+                generation, future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            self.in_flight -= 1
+            if not future.cancelled():
+                self.show_translation(generation, future.result())
+        if self.in_flight:
+            self.poll_id = self.root.after(TRANSLATION_POLL_MS, self.poll_translations)
+
+    def show_translation(self, generation: int, translated_text: str):
+        if generation != self.generation:
+            return
+        self.pending_request = None
         self.translated_text.delete("1.0", tk.END)
         self.translated_text.insert(tk.END, translated_text)
 
+    def on_source_modified(self, event):
+        # Clearing the flag re-arms <<Modified>> for the next edit
+        self.source_text.edit_modified(False)
+        self.schedule_auto_translate()
+
+    def schedule_auto_translate(self):
+        if not self.auto_translate_var.get():
+            return
+        if self.debounce_id is not None:
+            self.root.after_cancel(self.debounce_id)
+        self.debounce_id = self.root.after(AUTO_TRANSLATE_DEBOUNCE_MS, self.auto_translate)
+
+    def auto_translate(self):
+        self.debounce_id = None
+        self.translate_text(force=False)
+
+    def show_cache_stats(self):
+        stats = self.translation_engine.cache.stats()
+        messagebox.showinfo("Cache Statistics", "\n".join(f"{name.replace('_', ' ').capitalize()}: {value}"
+                                                          for name, value in stats.items()))
+
     def clear_text(self):
         self.source_text.delete("1.0", tk.END)
         self.translated_text.delete("1.0", tk.END)
@@ -197,37 +555,27 @@ class ProfessionalTranslator:
     def paste_text(self):
         try:
             text = self.root.clipboard_get()
+            # The insert raises <<Modified>>, which auto-translates when it is on
             self.source_text.insert(tk.END, text)
-            if self.auto_translate_var.get():
-                self.translate_text()
         except tk.TclError as e:
             messagebox.showerror("Paste Error", str(e))
 
     def toggle_auto_translate(self):
         if self.auto_translate_var.get():
-            self.start_auto_translate()
-        else:
-            self.stop_auto_translate()
-
-    def start_auto_translate(self):
-        if self.auto_translate_thread is None:
-            self.auto_translate_thread = threading.Thread(target=self.auto_translate)
-            self.auto_translate_thread.daemon = True
-            self.auto_translate_thread.start()
-
-    def stop_auto_translate(self):
-        if self.auto_translate_thread is not None:
-            self.auto_translate_thread = None
+            self.schedule_auto_translate()
+        elif self.debounce_id is not None:
+            self.root.after_cancel(self.debounce_id)
+            self.debounce_id = None
 
-    def auto_translate(self):
-        while self.auto_translate_var.get():
-            self.translate_text()
-            self.root.after(1000, self.auto_translate)
+    def close(self):
+        self.generation += 1
+        self.translation_engine.close()
 
 def main():
     root = tk.Tk()
     app = ProfessionalTranslator(root)
     root.mainloop()
+    app.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,86 @@
+"""Tests of SIMPLE_DATA_ANALYSIS_APP.py's CSV readers, run without a browser:
+
+    python -m unittest test_data_analysis
+"""
+import io
+import unittest
+
+try:
+    import pandas as pd
+    from SIMPLE_DATA_ANALYSIS_APP import _record_ends, parallel_read_csv, stream_csv
+except ImportError as e:
+    raise unittest.SkipTest(f"SIMPLE_DATA_ANALYSIS_APP.py needs its dependencies: {e}")
+
+
+def csv_bytes(header: str, rows) -> bytes:
+    return (header + "\n" + "".join(row + "\n" for row in rows)).encode()
+
+
+class StreamCsvTest(unittest.TestCase):
+    def test_column_changing_type_between_chunks_matches_a_full_read(self):
+        # First chunk: bool, int, int and small ints; second: int, float, text and a uint64
+        data = csv_bytes("flag,number,code,id",
+                         [f"True,{i},{i},1" for i in range(10)]
+                         + [f"{i},{i}.5,x{i},18446744073709551615" for i in range(10)])
+        full = pd.read_csv(io.BytesIO(data))
+        streamed = stream_csv(io.BytesIO(data), chunk_rows=10)
+        self.assertEqual(dict(streamed.dtypes), dict(full.dtypes))
+        self.assertEqual(streamed.shape, full.shape)
+        # Text columns are left out of describe(); numeric ones count every row
+        self.assertEqual(sorted(streamed.description.columns), ["id", "number"])
+        self.assertEqual(streamed.description.loc["count"].tolist(), [20, 20])
+
+    def test_integers_widened_to_float_need_no_second_read(self):
+        data = csv_bytes("value", [str(i) for i in range(10)] + ["", "1.5"])
+        streamed = stream_csv(io.BytesIO(data), chunk_rows=5)
+        self.assertEqual(streamed.dtypes["value"], pd.read_csv(io.BytesIO(data))["value"].dtype)
+        self.assertEqual(streamed.description.loc["count", "value"], 11)
+
+
+# Quoted newlines, escaped (doubled) quotes and a last record with no newline
+TRICKY_CSV = (b'id,text\n'
+              b'1,"two\nlines"\n'
+              b'2,"say ""hi""\nthen, leave"\n'
+              b'3,plain\n'
+              b'4,"""quoted"""')
+
+
+class RecordEndsTest(unittest.TestCase):
+    def test_newlines_inside_quotes_do_not_end_a_record(self):
+        first = TRICKY_CSV.index(b"two") + 1
+        self.assertEqual(_record_ends(TRICKY_CSV, [first]), [TRICKY_CSV.index(b"2,")])
+
+    def test_doubled_quotes_keep_the_quote_parity(self):
+        inside = TRICKY_CSV.index(b"then")
+        self.assertEqual(_record_ends(TRICKY_CSV, [inside]), [TRICKY_CSV.index(b"3,")])
+
+    def test_every_target_maps_to_the_end_of_its_record(self):
+        ends = [i + 1 for i in range(len(TRICKY_CSV)) if TRICKY_CSV[i:i + 2] in (b"\n1", b"\n2", b"\n3", b"\n4")]
+        # The last record has no newline, so targets inside it end at the end of the data
+        ends.append(len(TRICKY_CSV))
+        targets = range(len(TRICKY_CSV) + 1)
+        expected = [next(end for end in ends if end > target or end == len(TRICKY_CSV)) for target in targets]
+        self.assertEqual(_record_ends(TRICKY_CSV, targets), expected)
+
+
+class ParallelReadCsvTest(unittest.TestCase):
+    def assert_matches_full_read(self, data: bytes, range_bytes: int):
+        pd.testing.assert_frame_equal(parallel_read_csv(data, workers=2, range_bytes=range_bytes),
+                                      pd.read_csv(io.BytesIO(data)))
+
+    def test_quoted_newlines_escaped_quotes_and_no_trailing_newline(self):
+        data = TRICKY_CSV + b"\n" + b"\n".join(TRICKY_CSV.split(b"\n", 1)[1] for _ in range(20))
+        for range_bytes in (1, 7, 50):
+            self.assert_matches_full_read(data, range_bytes)
+
+    def test_ranges_reading_int64_and_uint64_keep_uint64(self):
+        data = csv_bytes("id", [str(i) for i in range(100)] + ["18446744073709551615"] * 100)
+        self.assert_matches_full_read(data, 100)
+
+    def test_ranges_reading_numbers_and_text_give_text(self):
+        data = csv_bytes("value,flag", [f"{i},True" for i in range(100)] + [f"x{i},{i}" for i in range(100)])
+        self.assert_matches_full_read(data, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
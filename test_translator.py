@@ -0,0 +1,116 @@
+"""Behaviour tests of Translator.py's TranslationEngine, run offline against FakeBackend:
+
+    python -m unittest test_translator
+"""
+import threading
+import time
+import unittest
+
+try:
+    from Translator import FakeBackend, TranslationBackend, TranslationCache, TranslationEngine
+except ImportError as e:
+    raise unittest.SkipTest(f"Translator.py needs its dependencies: {e}")
+
+
+class CountingBackend(FakeBackend):
+    """FakeBackend that records every text it is asked to translate."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        super().__init__(latency, jitter)
+        self.calls = []
+        self.calls_lock = threading.Lock()
+
+    def translate(self, text: str, source_lang: str, target_lang: str, timeout: float) -> str:
+        with self.calls_lock:
+            self.calls.append(text)
+        return super().translate(text, source_lang, target_lang, timeout)
+
+
+class SlowTextBackend(FakeBackend):
+    """FakeBackend that answers at once, except for one text that takes ``delay`` seconds."""
+
+    def __init__(self, slow_text: str, delay: float):
+        super().__init__(latency=0.0)
+        self.slow_text = slow_text
+        self.delay = delay
+
+    def translate(self, text: str, source_lang: str, target_lang: str, timeout: float) -> str:
+        if text == self.slow_text:
+            time.sleep(self.delay)
+        return super().translate(text, source_lang, target_lang, timeout)
+
+
+class StuckBackend(TranslationBackend):
+    """A backend that ignores its timeout."""
+
+    def translate(self, text: str, source_lang: str, target_lang: str, timeout: float) -> str:
+        time.sleep(3.0)
+        return text.upper()
+
+
+class TranslationEngineTest(unittest.TestCase):
+    def make_engine(self, backend: FakeBackend, **options) -> TranslationEngine:
+        options.setdefault("rate_limit", 1000.0)
+        engine = TranslationEngine(None, cache=TranslationCache(":memory:"), backend=backend, **options)
+        self.addCleanup(engine.cache.connection.close)
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_results_are_in_input_order(self):
+        # Jitter makes the requests finish out of order
+        engine = self.make_engine(FakeBackend(latency=0.05, jitter=0.04, seed=1))
+        texts = [f"segment {number}" for number in range(32)]
+        self.assertEqual(engine.translate_batch(texts, "en", "ur"), [f"[ur] {text}" for text in texts])
+
+    def test_repeated_requests_are_sent_once(self):
+        backend = CountingBackend()
+        engine = self.make_engine(backend)
+        results = engine.translate_batch(["hello", "world", "hello", "  hello "], "en", "ur")
+        self.assertEqual(results, ["[ur] hello", "[ur] world", "[ur] hello", "[ur] hello"])
+        self.assertEqual(sorted(backend.calls), ["hello", "world"])
+
+    def test_timeout_returns_original_text_uncached(self):
+        backend = CountingBackend(latency=0.5)
+        engine = self.make_engine(backend, timeout=0.05)
+        self.assertEqual(engine.translate("hello", "en", "ur"), "hello")
+        self.assertIsNone(engine.cache.get(engine.cache.key("hello", "en", "ur")))
+        # Not cached, so the next call goes to the backend again
+        engine.translate("hello", "en", "ur")
+        self.assertEqual(backend.calls, ["hello", "hello"])
+
+    def test_stuck_backend_gives_up_after_the_batch_deadline(self):
+        engine = self.make_engine(StuckBackend(), max_workers=1, timeout=0.1)
+        started = time.monotonic()
+        self.assertEqual(engine.translate("hello", "en", "ur"), "hello")
+        self.assertLess(time.monotonic() - started, 2.0)
+
+    def test_backends_must_implement_translate(self):
+        with self.assertRaises(TypeError):
+            TranslationBackend()
+
+    def test_cache_hits_skip_the_backend(self):
+        backend = CountingBackend()
+        engine = self.make_engine(backend)
+        engine.translate_batch(["hello", "world"], "en", "ur")
+        self.assertEqual(engine.translate_batch(["world", "hello"], "en", "ur"), ["[ur] world", "[ur] hello"])
+        self.assertEqual(engine.translate_many("hello", "en", ["ur", "fr"]), {"ur": "[ur] hello", "fr": "[fr] hello"})
+        self.assertEqual(sorted(backend.calls), ["hello", "hello", "world"])
+
+    def test_rate_limit(self):
+        # A burst of max_workers requests, then 20 per second
+        engine = self.make_engine(CountingBackend(), max_workers=4, rate_limit=20.0)
+        texts = [f"segment {number}" for number in range(24)]
+        started = time.monotonic()
+        engine.translate_batch(texts, "en", "ur")
+        self.assertGreaterEqual(time.monotonic() - started, (len(texts) - 4) / 20.0 * 0.9)
+
+    def test_submit_does_not_wait_behind_a_slow_request(self):
+        engine = self.make_engine(SlowTextBackend("slow", delay=0.5))
+        engine.submit("slow", "en", "ur")
+        started = time.monotonic()
+        self.assertEqual(engine.submit("fast", "en", "ur").result(), "[ur] fast")
+        self.assertLess(time.monotonic() - started, 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()